@@ -0,0 +1,315 @@
+"""Teste de carga HTTP da API de conciliação
+
+Sobe a aplicação em um SQLite temporário (ou no banco passado em --banco;
+DATABASE_URL, o banco de produção, nunca é usado), popula contas a
+receber e transações e dispara uma mistura configurável de requisições
+aos endpoints existentes a uma taxa alvo. Ao final mostra latência
+p50/p95/p99, vazão e taxa de erro por rota e grava o resultado em JSON
+para comparar entre versões. Uso:
+
+    python benchmarks/carga.py --duracao 30 --taxa 50
+    python benchmarks/carga.py --mix pendentes=5,sugestoes=3,automatica=1,upload=1
+    python benchmarks/carga.py --url http://localhost:5001 --comparar benchmarks/resultados/anterior.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import queue
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+PASTA_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+
+MIX_PADRAO = 'pendentes=4,sugestoes=4,listar=1,contas=2,automatica=1,upload=1'
+
+NOMES = ['JOAO SILVA', 'MARIA SOUZA', 'ANA LIMA', 'PEDRO COSTA', 'CARLA ROCHA', 'LUCAS ALVES', 'JULIA MENDES']
+
+def gerar_csv(quantidade, rnd):
+    """CSV de extrato no padrão brasileiro com créditos e débitos"""
+    linhas = ['Data;Histórico;Documento;Valor']
+    inicio = date.today() - timedelta(days=30)
+    for indice in range(quantidade):
+        dia = inicio + timedelta(days=rnd.randint(0, 30))
+        valor = Decimal(rnd.randint(1000, 500000)) / 100
+        if rnd.random() < 0.2:
+            valor = -valor
+        nome = rnd.choice(NOMES)
+        linhas.append(f"{dia.strftime('%d/%m/%Y')};PIX {nome} PED{rnd.randint(1, 99999)};{indice};{str(valor).replace('.', ',')}")
+    return ('\n'.join(linhas) + '\n').encode('utf-8')
+
+def popular_banco(app, contas, transacoes, rnd):
+    """Cria o esquema e insere a massa inicial"""
+    from src.models.conciliacao import db, ContaReceber
+    from src.routes.extrato import gravar_extrato
+    from src.services.leitor_extrato import ler_csv_extrato
+
+    with app.app_context():
+        db.create_all()
+
+        inicio = date.today() - timedelta(days=30)
+        db.session.execute(db.insert(ContaReceber), [
+            {
+                'numero_pedido': f'PED{indice}',
+                'cliente_nome': rnd.choice(NOMES).title(),
+                'valor_esperado': Decimal(rnd.randint(1000, 500000)) / 100,
+                'data_vencimento': inicio + timedelta(days=rnd.randint(0, 40)),
+                'status': 'pendente',
+                'data_criacao': datetime.utcnow()
+            }
+            for indice in range(contas)
+        ])
+        db.session.commit()
+
+        gravar_extrato('carga_inicial.csv', ler_csv_extrato(gerar_csv(transacoes, rnd))['transacoes'])
+
+def iniciar_servidor(app):
+    """Sobe a aplicação em uma thread com o servidor do Werkzeug"""
+    from werkzeug.serving import make_server
+
+    # O log de cada requisição pesaria na medição
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f'http://127.0.0.1:{servidor.server_port}'
+
+def corpo_multipart(nome_campo, nome_arquivo, conteudo):
+    """Monta um corpo multipart/form-data com um único arquivo"""
+    fronteira = uuid.uuid4().hex
+    corpo = (
+        f'--{fronteira}\r\n'
+        f'Content-Disposition: form-data; name="{nome_campo}"; filename="{nome_arquivo}"\r\n'
+        'Content-Type: text/csv\r\n\r\n'
+    ).encode('utf-8') + conteudo + f'\r\n--{fronteira}--\r\n'.encode('utf-8')
+    return corpo, f'multipart/form-data; boundary={fronteira}'
+
+class Cenario:
+    """Gera as requisições de cada rota da mistura"""
+
+    def __init__(self, transacoes_ids, linhas_upload):
+        self.transacoes_ids = transacoes_ids or [0]
+        self.linhas_upload = linhas_upload
+
+    def requisicao(self, rota, rnd):
+        """Retorna (método, caminho, corpo, cabeçalhos) para a rota"""
+        if rota == 'pendentes':
+            return 'GET', '/api/conciliacao/pendentes', None, {}
+        if rota == 'sugestoes':
+            return 'GET', f'/api/conciliacao/sugestoes/{rnd.choice(self.transacoes_ids)}', None, {}
+        if rota == 'listar':
+            return 'GET', '/api/conciliacao/listar', None, {}
+        if rota == 'contas':
+            return 'GET', '/api/conta-receber/pendentes', None, {}
+        if rota == 'status':
+            return 'GET', '/api/status', None, {}
+        if rota == 'automatica':
+            return 'POST', '/api/conciliacao/automatica', b'{"confianca_minima": 0.8}', {'Content-Type': 'application/json'}
+        if rota == 'upload':
+            corpo, tipo = corpo_multipart('arquivo', f'carga_{uuid.uuid4().hex[:8]}.csv', gerar_csv(self.linhas_upload, rnd))
+            return 'POST', '/api/extrato/upload', corpo, {'Content-Type': tipo}
+        raise ValueError(f'Rota desconhecida na mistura: {rota}')
+
+def ler_mix(texto):
+    """Converte 'pendentes=4,upload=1' em lista de (rota, peso)"""
+    mix = []
+    for item in texto.split(','):
+        rota, _, peso = item.partition('=')
+        mix.append((rota.strip(), float(peso or 1)))
+    return mix
+
+def executar_carga(url_base, cenario, mix, taxa, duracao, concorrencia, semente):
+    """Dispara requisições em malha aberta na taxa alvo e coleta as latências"""
+    destino = urlsplit(url_base)
+    rotas = [rota for rota, _ in mix]
+    pesos = [peso for _, peso in mix]
+    agenda = queue.Queue()
+    medicoes = []
+    trava = threading.Lock()
+
+    def trabalhador(indice):
+        rnd = random.Random(semente + indice)
+        conexao = http.client.HTTPConnection(destino.hostname, destino.port, timeout=120)
+        while True:
+            item = agenda.get()
+            if item is None:
+                break
+            rota, previsto = item
+            metodo, caminho, corpo, cabecalhos = cenario.requisicao(rota, rnd)
+            inicio = time.perf_counter()
+            try:
+                conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+                resposta = conexao.getresponse()
+                resposta.read()
+                status = resposta.status
+            except Exception:
+                conexao.close()
+                conexao = http.client.HTTPConnection(destino.hostname, destino.port, timeout=120)
+                status = 0
+            fim = time.perf_counter()
+            with trava:
+                medicoes.append((rota, fim - inicio, inicio - previsto, status))
+
+    trabalhadores = [threading.Thread(target=trabalhador, args=(indice,), daemon=True) for indice in range(concorrencia)]
+    for thread in trabalhadores:
+        thread.start()
+
+    rnd = random.Random(semente)
+    intervalo = 1.0 / taxa
+    inicio = time.perf_counter()
+    proximo = inicio
+    while proximo - inicio < duracao:
+        espera = proximo - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        agenda.put((rnd.choices(rotas, pesos)[0], proximo))
+        proximo += intervalo
+
+    for _ in trabalhadores:
+        agenda.put(None)
+    for thread in trabalhadores:
+        thread.join()
+
+    return medicoes, time.perf_counter() - inicio
+
+def percentil(valores_ordenados, p):
+    """Percentil pelo método do posto mais próximo"""
+    if not valores_ordenados:
+        return None
+    posicao = max(0, min(len(valores_ordenados) - 1, int(round(p / 100 * len(valores_ordenados) + 0.5)) - 1))
+    return valores_ordenados[posicao]
+
+def resumir(medicoes, tempo_total):
+    """Agrupa as medições por rota"""
+    por_rota = {}
+    for rota, latencia, atraso, status in medicoes:
+        por_rota.setdefault(rota, []).append((latencia, atraso, status))
+
+    resumo = {}
+    for rota, itens in sorted(por_rota.items()):
+        latencias = sorted(latencia * 1000 for latencia, _, _ in itens)
+        erros = sum(1 for _, _, status in itens if status == 0 or status >= 400)
+        resumo[rota] = {
+            'requisicoes': len(itens),
+            'erros': erros,
+            'taxa_erro': erros / len(itens),
+            'vazao_rps': len(itens) / tempo_total,
+            'p50_ms': percentil(latencias, 50),
+            'p95_ms': percentil(latencias, 95),
+            'p99_ms': percentil(latencias, 99),
+            'media_ms': statistics.fmean(latencias),
+            'atraso_medio_ms': statistics.fmean(atraso * 1000 for _, atraso, _ in itens),
+        }
+    return resumo
+
+def imprimir(resumo):
+    print(f'{"rota":<12}{"req":>7}{"rps":>8}{"erro %":>8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}')
+    for rota, dados in resumo.items():
+        print(f'{rota:<12}{dados["requisicoes"]:>7}{dados["vazao_rps"]:>8.1f}{dados["taxa_erro"] * 100:>8.1f}'
+              f'{dados["p50_ms"]:>10.1f}{dados["p95_ms"]:>10.1f}{dados["p99_ms"]:>10.1f}')
+
+def comparar(resumo, caminho_anterior):
+    """Mostra a variação de p95 e vazão em relação a um resultado anterior"""
+    with open(caminho_anterior, encoding='utf-8') as arquivo:
+        anterior = json.load(arquivo)['rotas']
+
+    print(f'\nComparação com {caminho_anterior}')
+    print(f'{"rota":<12}{"p95 antes":>11}{"p95 agora":>11}{"var %":>8}{"rps antes":>11}{"rps agora":>11}')
+    for rota, dados in resumo.items():
+        if rota not in anterior:
+            continue
+        antes = anterior[rota]
+        variacao = (dados['p95_ms'] - antes['p95_ms']) / antes['p95_ms'] * 100 if antes['p95_ms'] else 0.0
+        print(f'{rota:<12}{antes["p95_ms"]:>11.1f}{dados["p95_ms"]:>11.1f}{variacao:>+8.1f}'
+              f'{antes["vazao_rps"]:>11.1f}{dados["vazao_rps"]:>11.1f}')
+
+def versao_git():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Usa uma instância já em execução em vez de subir a aplicação')
+    parser.add_argument('--banco', help='Banco descartável para a aplicação local, ex.: um PostgreSQL local (padrão: SQLite temporário)')
+    parser.add_argument('--duracao', type=float, default=20, help='Segundos de carga')
+    parser.add_argument('--taxa', type=float, default=20, help='Requisições por segundo')
+    parser.add_argument('--concorrencia', type=int, default=8, help='Conexões simultâneas')
+    parser.add_argument('--mix', default=MIX_PADRAO, help='Pesos das rotas (rota=peso,...)')
+    parser.add_argument('--contas', type=int, default=2000, help='Contas a receber iniciais')
+    parser.add_argument('--transacoes', type=int, default=2000, help='Transações iniciais')
+    parser.add_argument('--linhas-upload', type=int, default=200, help='Linhas em cada extrato enviado')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', default=PASTA_RESULTADOS, help='Pasta onde o resultado é gravado')
+    parser.add_argument('--comparar', help='Resultado anterior (JSON) para comparação')
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semente)
+    servidor = None
+    url_base = args.url
+    arquivo_banco = None
+
+    if not url_base:
+        from src.main import create_app
+
+        url_banco = args.banco
+        if not url_banco:
+            descritor, arquivo_banco = tempfile.mkstemp(suffix='.db')
+            os.close(descritor)
+            url_banco = f'sqlite:///{arquivo_banco}'
+
+        app = create_app({'SQLALCHEMY_DATABASE_URI': url_banco})
+        popular_banco(app, args.contas, args.transacoes, rnd)
+        servidor, url_base = iniciar_servidor(app)
+
+    try:
+        destino = urlsplit(url_base)
+        conexao = http.client.HTTPConnection(destino.hostname, destino.port, timeout=120)
+        conexao.request('GET', '/api/conciliacao/pendentes')
+        pendentes = json.loads(conexao.getresponse().read())
+        conexao.close()
+        cenario = Cenario([transacao['id'] for transacao in pendentes.get('transacoes_pendentes', [])], args.linhas_upload)
+
+        medicoes, tempo_total = executar_carga(
+            url_base, cenario, ler_mix(args.mix), args.taxa, args.duracao, args.concorrencia, args.semente
+        )
+    finally:
+        if servidor:
+            servidor.shutdown()
+        if arquivo_banco:
+            os.remove(arquivo_banco)
+
+    resumo = resumir(medicoes, tempo_total)
+    imprimir(resumo)
+
+    resultado = {
+        'data': datetime.now().isoformat(),
+        'versao': versao_git(),
+        'parametros': {chave: valor for chave, valor in vars(args).items() if chave not in ('saida', 'comparar')},
+        'tempo_total_s': tempo_total,
+        'rotas': resumo,
+    }
+    os.makedirs(args.saida, exist_ok=True)
+    caminho = os.path.join(args.saida, f"carga_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f'\nResultado gravado em {caminho}')
+
+    if args.comparar:
+        comparar(resumo, args.comparar)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Mede o tempo de inicialização da aplicação
+
+Cada amostra roda em um processo novo (como um worker do gunicorn) e mede
+a importação de src.main, a chamada de create_app() e a primeira requisição
+a /api/status. Uso:
+
+    python benchmarks/inicializacao.py --repeticoes 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+AMOSTRA = """
+import json, time
+inicio = time.perf_counter()
+from src.main import create_app
+importado = time.perf_counter()
+app = create_app({'SQLALCHEMY_DATABASE_URI': %r})
+criado = time.perf_counter()
+resposta = app.test_client().get('/api/status')
+assert resposta.status_code == 200
+fim = time.perf_counter()
+print(json.dumps({
+    'importacao': importado - inicio,
+    'create_app': criado - importado,
+    'primeira_requisicao': fim - criado,
+    'total': fim - inicio,
+}))
+"""
+
+def medir(repeticoes, url_banco):
+    """Executa as amostras e devolve os tempos de cada etapa"""
+    amostras = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, '-c', AMOSTRA % url_banco],
+            cwd=RAIZ, capture_output=True, text=True, check=True
+        )
+        amostras.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return amostras
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=10)
+    parser.add_argument('--banco', default=os.environ.get('DATABASE_URL', 'sqlite://'))
+    args = parser.parse_args()
+
+    amostras = medir(args.repeticoes, args.banco)
+
+    print(f'{"etapa":<22}{"mínimo (ms)":>14}{"mediana (ms)":>14}{"máximo (ms)":>14}')
+    for etapa in ('importacao', 'create_app', 'primeira_requisicao', 'total'):
+        tempos = [amostra[etapa] * 1000 for amostra in amostras]
+        print(f'{etapa:<22}{min(tempos):>14.1f}{statistics.median(tempos):>14.1f}{max(tempos):>14.1f}')
+
+if __name__ == '__main__':
+    main()
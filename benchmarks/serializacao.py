@@ -0,0 +1,176 @@
+"""Compara a serialização das listagens com o caminho to_dict + jsonify
+
+Popula um SQLite temporário e, para /api/conciliacao/pendentes e
+/api/conciliacao/listar, mede o tempo da implementação anterior (objetos
+ORM, to_dict por linha e jsonify), da atual com orjson e da atual com a
+biblioteca padrão, conferindo que os três corpos são idênticos byte a
+byte. Os dados incluem nomes acentuados (escape \\uXXXX); com
+--casos-limite, uma confiança muito pequena (2e-05) força o retorno à
+biblioteca padrão em /listar. Uso:
+
+    python benchmarks/serializacao.py --transacoes 20000 --repeticoes 5
+"""
+import argparse
+import gzip
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+NOMES = ['João Silva', 'Maria Conceição', 'Ana Lima', 'José Araújo', 'Pedro Costa', 'Carla Rocha', 'Lucas Alves']
+
+def popular(db, quantidade, rnd, casos_limite=False):
+    """Cria transações e contas pendentes e conciliações entre parte delas"""
+    from src.models.conciliacao import Extrato, Transacao, ContaReceber, Conciliacao
+
+    extrato = Extrato(nome_arquivo='benchmark.csv', status='concluido')
+    db.session.add(extrato)
+    db.session.flush()
+
+    inicio = date(2025, 1, 1)
+    db.session.execute(db.insert(Transacao), [
+        {
+            'extrato_id': extrato.id,
+            'data_transacao': inicio + timedelta(days=rnd.randint(0, 365)),
+            'valor': Decimal(rnd.randint(1000, 1000000)) / 100,
+            'tipo': 'credito',
+            'descricao': f'PIX {rnd.choice(NOMES).upper()} PED{indice}',
+            'documento': str(indice),
+            'nome_pagador': rnd.choice(NOMES).upper(),
+            'status_conciliacao': 'pendente' if indice % 2 else 'conciliado',
+            'confianca_conciliacao': None if indice % 2 else (2e-05 if casos_limite and indice == 0 else rnd.random())
+        }
+        for indice in range(quantidade)
+    ])
+    db.session.execute(db.insert(ContaReceber), [
+        {
+            'numero_pedido': f'PED{indice}',
+            'cliente_nome': rnd.choice(NOMES),
+            'valor_esperado': Decimal(rnd.randint(1000, 1000000)) / 100,
+            'data_vencimento': inicio + timedelta(days=rnd.randint(0, 365)),
+            'data_criacao': datetime(2025, 1, 1) + timedelta(days=rnd.randint(0, 365), seconds=rnd.randint(0, 86399)),
+            'status': 'pendente' if indice % 2 else 'pago',
+            'observacoes': rnd.choice([None, 'Cobrança enviada'])
+        }
+        for indice in range(quantidade)
+    ])
+    db.session.execute(db.insert(Conciliacao), [
+        {
+            'transacao_id': indice + 1,
+            'conta_receber_id': indice + 1,
+            'data_conciliacao': datetime(2025, 6, 1) + timedelta(seconds=indice),
+            'tipo_conciliacao': 'automatica',
+            'confianca': rnd.random(),
+            'observacoes': 'Conciliação automática',
+            'usuario_responsavel': 'Sistema'
+        }
+        for indice in range(0, quantidade, 2)
+    ])
+    db.session.commit()
+
+def pendentes_to_dict():
+    """Implementação anterior de /pendentes"""
+    from flask import jsonify
+    from src.models.conciliacao import Transacao, ContaReceber
+
+    transacoes_pendentes = Transacao.query.filter_by(
+        status_conciliacao='pendente',
+        tipo='credito'
+    ).order_by(Transacao.data_transacao.desc()).all()
+    contas_pendentes = ContaReceber.query.filter_by(status='pendente').order_by(ContaReceber.data_vencimento).all()
+
+    return jsonify({
+        'transacoes_pendentes': [t.to_dict() for t in transacoes_pendentes],
+        'contas_pendentes': [c.to_dict() for c in contas_pendentes],
+        'total_transacoes': len(transacoes_pendentes),
+        'total_contas': len(contas_pendentes)
+    })
+
+def listar_to_dict():
+    """Implementação anterior de /listar"""
+    from flask import jsonify
+    from src.models.conciliacao import db, Transacao, ContaReceber, Conciliacao
+
+    conciliacoes = db.session.query(Conciliacao).join(Transacao).join(ContaReceber).order_by(
+        Conciliacao.data_conciliacao.desc()
+    ).all()
+
+    resultado = []
+    for conciliacao in conciliacoes:
+        item = conciliacao.to_dict()
+        item['transacao'] = conciliacao.transacao.to_dict()
+        item['conta_receber'] = conciliacao.conta_receber.to_dict()
+        resultado.append(item)
+
+    return jsonify({'conciliacoes': resultado})
+
+def medir(app, funcao, repeticoes):
+    """Tempo médio (ms) e corpo da resposta de uma view"""
+    from src.models.conciliacao import db
+
+    tempos = []
+    corpo = None
+    for _ in range(repeticoes):
+        with app.test_request_context():
+            inicio = time.perf_counter()
+            corpo = funcao().get_data()
+            tempos.append(time.perf_counter() - inicio)
+            db.session.remove()
+    return statistics.fmean(tempos) * 1000, corpo
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--transacoes', type=int, default=10000, help='Transações (e contas) criadas')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--casos-limite', action='store_true', help='Inclui um float escrito com expoente')
+    args = parser.parse_args()
+
+    from src.main import create_app
+    from src.models.conciliacao import db
+    from src.routes.conciliacao import listar_pendentes, listar_conciliacoes
+    from src.services import serializacao
+
+    descritor, caminho = tempfile.mkstemp(suffix='.db')
+    os.close(descritor)
+    divergencias = 0
+
+    try:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}', 'RESPOSTA_GZIP_MINIMO': None})
+        with app.app_context():
+            db.create_all()
+            popular(db, args.transacoes, random.Random(args.semente), args.casos_limite)
+
+        print(f'{"rota":<12}{"to_dict (ms)":>14}{"orjson (ms)":>14}{"padrão (ms)":>14}{"bytes":>12}{"gzip":>10}  idêntico')
+        for rota, antiga, nova in (('/pendentes', pendentes_to_dict, listar_pendentes), ('/listar', listar_to_dict, listar_conciliacoes)):
+            tempo_antigo, corpo_antigo = medir(app, antiga, args.repeticoes)
+            tempo_orjson, corpo_orjson = medir(app, nova, args.repeticoes)
+
+            backend = serializacao.orjson
+            serializacao.orjson = None
+            try:
+                tempo_padrao, corpo_padrao = medir(app, nova, args.repeticoes)
+            finally:
+                serializacao.orjson = backend
+
+            identico = corpo_antigo == corpo_orjson == corpo_padrao
+            divergencias += not identico
+            print(
+                f'{rota:<12}{tempo_antigo:>14.1f}{tempo_orjson:>14.1f}{tempo_padrao:>14.1f}'
+                f'{len(corpo_antigo):>12}{len(gzip.compress(corpo_antigo, compresslevel=6)):>10}  {"sim" if identico else "NÃO"}'
+            )
+    finally:
+        os.remove(caminho)
+
+    if divergencias:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
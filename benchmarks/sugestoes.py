@@ -0,0 +1,133 @@
+"""Compara as sugestões em SQL com a pontuação em Python
+
+Para cada tamanho da tabela de contas a receber, popula um SQLite
+temporário, pede sugestões para uma amostra de créditos pela varredura
+completa em Python, pela seleção das melhores com poda e pelo SQL,
+confere se as listas são iguais (conta, confiança e ordem) e mostra a
+latência média de cada caminho. Uso:
+
+    python benchmarks/sugestoes.py --tamanhos 1000,10000,50000 --amostra 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Inclui nomes acentuados e nomes contidos em outros, que só o nome ou o pedido aproximam
+NOMES = [
+    'João Silva', 'Maria Souza', 'Maria Souza Lima', 'Ana Lima', 'Silva João', 'Pedro Costa',
+    'Carla Rocha', 'Lucas Alves', 'José', 'JOSÉ ARAÚJO', 'Conceição'
+]
+
+def popular(db, contas, transacoes, rnd):
+    """Insere contas e créditos sintéticos espalhados em valor e data"""
+    from src.models.conciliacao import Extrato, Transacao, ContaReceber
+
+    inicio = date(2025, 1, 1)
+    db.session.execute(db.insert(ContaReceber), [
+        {
+            'numero_pedido': f'PED{rnd.randint(1, contas)}',
+            'cliente_nome': rnd.choice(NOMES),
+            'cliente_cpf_cnpj': rnd.choice([None, None, f'{rnd.randint(0, 999):03d}.000.000-00']),
+            'valor_esperado': Decimal(rnd.randint(1000, 1000000)) / 100,
+            'data_vencimento': inicio + timedelta(days=rnd.randint(0, 365)) if rnd.random() < 0.9 else None,
+            'data_criacao': datetime(2025, 1, 1) + timedelta(days=rnd.randint(0, 365), hours=rnd.randint(0, 23)),
+            'status': 'pendente'
+        }
+        for _ in range(contas)
+    ])
+
+    extrato = Extrato(nome_arquivo='benchmark.csv', status='concluido')
+    db.session.add(extrato)
+    db.session.flush()
+
+    db.session.execute(db.insert(Transacao), [
+        {
+            'extrato_id': extrato.id,
+            'data_transacao': inicio + timedelta(days=rnd.randint(0, 365)),
+            'valor': Decimal(rnd.randint(1000, 1000000)) / 100,
+            'tipo': 'credito',
+            'descricao': f'PIX {rnd.choice(NOMES).upper()} PED{rnd.randint(1, contas)}',
+            'nome_pagador': rnd.choice(NOMES).upper(),
+            'cpf_cnpj_pagador': rnd.choice([None, f'{rnd.randint(0, 999):03d}.000.000-00']),
+            'status_conciliacao': 'pendente'
+        }
+        for _ in range(transacoes)
+    ])
+    db.session.commit()
+
+def medir(tamanho, amostra, semente):
+    from src.main import create_app
+    from src.models.conciliacao import db, Transacao
+    from src.services.pontuacao import (
+        encontrar_correspondencias_automaticas, limpar_cache_pontuacao, sugerir_correspondencias_sql
+    )
+
+    descritor, caminho = tempfile.mkstemp(suffix='.db')
+    os.close(descritor)
+    try:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}'})
+        with app.app_context():
+            db.create_all()
+            popular(db, tamanho, amostra, random.Random(semente))
+
+            tempos_python = []
+            tempos_poda = []
+            tempos_sql = []
+            divergencias = 0
+
+            # Cada caminho começa com o cache de pares vazio
+            for transacao in Transacao.query.all():
+                limpar_cache_pontuacao()
+                inicio = time.perf_counter()
+                python = encontrar_correspondencias_automaticas(transacao)[:5]
+                tempos_python.append(time.perf_counter() - inicio)
+
+                limpar_cache_pontuacao()
+                inicio = time.perf_counter()
+                poda = encontrar_correspondencias_automaticas(transacao, limite=5)
+                tempos_poda.append(time.perf_counter() - inicio)
+
+                limpar_cache_pontuacao()
+                inicio = time.perf_counter()
+                sql = sugerir_correspondencias_sql(transacao, limite=5)
+                tempos_sql.append(time.perf_counter() - inicio)
+
+                esperado = [(c['conta'].id, c['confianca'], c['fatores']) for c in python]
+                obtidos = [[(c['conta'].id, c['confianca'], c['fatores']) for c in lista] for lista in (poda, sql)]
+                if any(obtido != esperado for obtido in obtidos):
+                    divergencias += 1
+
+            db.session.remove()
+    finally:
+        os.remove(caminho)
+
+    return tuple(statistics.fmean(tempos) * 1000 for tempos in (tempos_python, tempos_poda, tempos_sql)) + (divergencias,)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', default='1000,5000,20000', help='Quantidades de contas a receber')
+    parser.add_argument('--amostra', type=int, default=30, help='Créditos consultados por tamanho')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f'{"contas":>8}{"python (ms)":>14}{"poda (ms)":>12}{"sql (ms)":>12}{"divergências":>14}')
+    houve_divergencia = False
+    for tamanho in (int(valor) for valor in args.tamanhos.split(',')):
+        python, poda, sql, divergencias = medir(tamanho, args.amostra, args.semente)
+        houve_divergencia = houve_divergencia or divergencias > 0
+        print(f'{tamanho:>8}{python:>14.2f}{poda:>12.2f}{sql:>12.2f}{divergencias:>14}')
+
+    if houve_divergencia:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
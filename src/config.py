@@ -0,0 +1,88 @@
+import os
+
+# Banco local usado quando DATABASE_URL não é informada
+DATABASE_PADRAO = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+
+MEGABYTE = 1024 * 1024
+
+def ler_bool(nome, padrao=False):
+    """Lê uma variável de ambiente booleana"""
+    valor = os.environ.get(nome)
+    if valor is None:
+        return padrao
+    return valor.strip().lower() in ('1', 'true', 'sim', 'yes', 'on')
+
+def ler_int(nome, padrao=None):
+    """Lê uma variável de ambiente inteira"""
+    valor = os.environ.get(nome)
+    if not valor:
+        return padrao
+    return int(valor)
+
+def ler_float(nome, padrao=None):
+    """Lê uma variável de ambiente decimal"""
+    valor = os.environ.get(nome)
+    if not valor:
+        return padrao
+    return float(valor)
+
+def normalizar_url_banco(url):
+    """Aceita o prefixo postgres:// fornecido por alguns provedores"""
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def carregar_configuracao():
+    """Monta a configuração da aplicação a partir das variáveis de ambiente
+
+    DATABASE_URL       URL do banco (padrão: SQLite local em src/database/app.db)
+    DB_POOL_SIZE       conexões mantidas no pool (ignorado no SQLite)
+    DB_POOL_PRE_PING   testa a conexão antes de usar (padrão: ligado)
+    DB_STATEMENT_TIMEOUT  tempo máximo de cada comando em ms (PostgreSQL)
+    IMPORTACAO_EXECUTOR   'thread' ou 'process' para ler extratos em lote
+    IMPORTACAO_WORKERS    leituras simultâneas no upload em lote (padrão: núcleos)
+    IMPORTACAO_ZIP_MAXIMO_ARQUIVOS     arquivos aceitos em cada ZIP do upload em lote (padrão: 500)
+    IMPORTACAO_ZIP_TAMANHO_MAXIMO_MB   tamanho descompactado de cada ZIP (padrão: 200)
+    IMPORTACAO_ARQUIVO_TAMANHO_MAXIMO_MB  tamanho descompactado de cada extrato do ZIP (padrão: 50)
+    UPLOAD_TAMANHO_MAXIMO_MB  tamanho máximo do corpo de uma requisição (padrão: 100)
+    INGESTAO_TAMANHO_LOTE transações por gravação na ingestão em tempo real (padrão: 100)
+    INGESTAO_INTERVALO_MS espera máxima de uma transação recebida antes de ser gravada (padrão: 500)
+    INGESTAO_CONFIANCA_MINIMA  confiança para conciliar os créditos recebidos (padrão: 0.8)
+    RESPOSTA_GZIP_MINIMO  tamanho em bytes a partir do qual listagens são comprimidas (padrão: 1024)
+    VENCIMENTO_INTERVALO_MINUTOS  intervalo da varredura de contas vencidas em cada processo; 0 desliga (padrão: 60)
+    """
+    return {
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT'),
+        'SQLALCHEMY_DATABASE_URI': normalizar_url_banco(os.environ.get('DATABASE_URL', DATABASE_PADRAO)),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'DB_POOL_SIZE': ler_int('DB_POOL_SIZE'),
+        'DB_POOL_PRE_PING': ler_bool('DB_POOL_PRE_PING', True),
+        'DB_STATEMENT_TIMEOUT': ler_int('DB_STATEMENT_TIMEOUT'),
+        'IMPORTACAO_EXECUTOR': os.environ.get('IMPORTACAO_EXECUTOR', 'thread'),
+        'IMPORTACAO_WORKERS': ler_int('IMPORTACAO_WORKERS'),
+        'IMPORTACAO_ZIP_MAXIMO_ARQUIVOS': ler_int('IMPORTACAO_ZIP_MAXIMO_ARQUIVOS', 500),
+        'IMPORTACAO_ZIP_TAMANHO_MAXIMO': ler_int('IMPORTACAO_ZIP_TAMANHO_MAXIMO_MB', 200) * MEGABYTE,
+        'IMPORTACAO_ARQUIVO_TAMANHO_MAXIMO': ler_int('IMPORTACAO_ARQUIVO_TAMANHO_MAXIMO_MB', 50) * MEGABYTE,
+        'MAX_CONTENT_LENGTH': ler_int('UPLOAD_TAMANHO_MAXIMO_MB', 100) * MEGABYTE,
+        'INGESTAO_TAMANHO_LOTE': ler_int('INGESTAO_TAMANHO_LOTE', 100),
+        'INGESTAO_INTERVALO_MS': ler_int('INGESTAO_INTERVALO_MS', 500),
+        'INGESTAO_CONFIANCA_MINIMA': ler_float('INGESTAO_CONFIANCA_MINIMA', 0.8),
+        'RESPOSTA_GZIP_MINIMO': ler_int('RESPOSTA_GZIP_MINIMO', 1024),
+        'VENCIMENTO_INTERVALO_MINUTOS': ler_int('VENCIMENTO_INTERVALO_MINUTOS', 60),
+    }
+
+def opcoes_engine(config):
+    """Traduz a configuração do pool para SQLALCHEMY_ENGINE_OPTIONS"""
+    url = config['SQLALCHEMY_DATABASE_URI']
+    opcoes = {'pool_pre_ping': config.get('DB_POOL_PRE_PING', True)}
+
+    if url.startswith('sqlite'):
+        return opcoes
+
+    if config.get('DB_POOL_SIZE'):
+        opcoes['pool_size'] = config['DB_POOL_SIZE']
+
+    if config.get('DB_STATEMENT_TIMEOUT') and url.startswith('postgresql'):
+        opcoes['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT']}"}
+
+    return opcoes
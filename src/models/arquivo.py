@@ -0,0 +1,112 @@
+from datetime import datetime
+from src.models.conciliacao import db, Transacao, ContaReceber, Conciliacao
+
+# Tabelas de histórico frio: guardam os períodos já conciliados e fechados,
+# retirados das tabelas quentes pelo comando de arquivamento.
+# As colunas espelham as tabelas quentes (mesmos nomes) para permitir
+# INSERT ... SELECT direto; não há chaves estrangeiras para que as linhas
+# possam ser movidas em blocos.
+
+class TransacaoArquivo(db.Model):
+    """Transações de períodos arquivados"""
+    __tablename__ = 'transacao_arquivo'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    extrato_id = db.Column(db.Integer, nullable=False, index=True)
+    empresa = db.Column(db.String(50))
+    
+    data_transacao = db.Column(db.Date, nullable=False, index=True)
+    valor = db.Column(db.Numeric(15, 2), nullable=False)
+    tipo = db.Column(db.String(20), nullable=False)
+    descricao = db.Column(db.Text)
+    documento = db.Column(db.String(100))
+    
+    nome_pagador = db.Column(db.String(255))
+    cpf_cnpj_pagador = db.Column(db.String(20))
+    banco_origem = db.Column(db.String(100))
+    
+    status_conciliacao = db.Column(db.String(50))
+    confianca_conciliacao = db.Column(db.Float)
+    
+    data_arquivamento = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<TransacaoArquivo {self.id} - {self.valor}>'
+    
+    # Mesmo formato da transação ativa
+    to_dict = Transacao.to_dict
+
+class ContaReceberArquivo(db.Model):
+    """Contas a receber quitadas em períodos arquivados"""
+    __tablename__ = 'conta_receber_arquivo'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    empresa = db.Column(db.String(50))
+    numero_pedido = db.Column(db.String(100))
+    cliente_nome = db.Column(db.String(255), nullable=False)
+    cliente_cpf_cnpj = db.Column(db.String(20))
+    valor_esperado = db.Column(db.Numeric(15, 2), nullable=False)
+    data_vencimento = db.Column(db.Date)
+    data_criacao = db.Column(db.DateTime)
+    status = db.Column(db.String(50))
+    observacoes = db.Column(db.Text)
+    
+    data_arquivamento = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ContaReceberArquivo {self.numero_pedido} - {self.cliente_nome}>'
+    
+    to_dict = ContaReceber.to_dict
+
+class ConciliacaoArquivo(db.Model):
+    """Conciliações de períodos arquivados"""
+    __tablename__ = 'conciliacao_arquivo'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    transacao_id = db.Column(db.Integer, nullable=False, index=True)
+    conta_receber_id = db.Column(db.Integer, nullable=False, index=True)
+    
+    data_conciliacao = db.Column(db.DateTime)
+    tipo_conciliacao = db.Column(db.String(50), nullable=False)
+    confianca = db.Column(db.Float)
+    pontuacao_valor = db.Column(db.Float, index=True)
+    pontuacao_identificacao = db.Column(db.Float)
+    pontuacao_data = db.Column(db.Float)
+    pontuacao_pedido = db.Column(db.Float)
+    observacoes = db.Column(db.Text)
+    usuario_responsavel = db.Column(db.String(100))
+    
+    data_arquivamento = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ConciliacaoArquivo {self.id}>'
+    
+    to_dict = Conciliacao.to_dict
+
+class PeriodoArquivado(db.Model):
+    """Meses já movidos para as tabelas de arquivo"""
+    __tablename__ = 'periodo_arquivado'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    mes = db.Column(db.String(7), unique=True, nullable=False)  # YYYY-MM
+    inicio = db.Column(db.Date, nullable=False)
+    fim = db.Column(db.Date, nullable=False)
+    total_transacoes = db.Column(db.Integer, default=0)
+    total_conciliacoes = db.Column(db.Integer, default=0)
+    total_contas = db.Column(db.Integer, default=0)
+    data_arquivamento = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PeriodoArquivado {self.mes}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'mes': self.mes,
+            'inicio': self.inicio.isoformat() if self.inicio else None,
+            'fim': self.fim.isoformat() if self.fim else None,
+            'total_transacoes': self.total_transacoes,
+            'total_conciliacoes': self.total_conciliacoes,
+            'total_contas': self.total_contas,
+            'data_arquivamento': self.data_arquivamento.isoformat() if self.data_arquivamento else None
+        }
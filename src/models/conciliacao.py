@@ -3,11 +3,28 @@ from datetime import datetime
 
 db = SQLAlchemy()
 
+# Indica que a consulta não deve ser restrita a uma empresa
+QUALQUER_EMPRESA = object()
+
+def mesma_empresa(coluna, empresa):
+    """Condição de escopo: mesma empresa, ou ambos sem empresa"""
+    if empresa is None:
+        return coluna.is_(None)
+    return coluna == empresa
+
+# Contas a receber ainda não pagas; 'vencido' é marcado pela varredura de vencimentos
+STATUS_EM_ABERTO = ('pendente', 'vencido')
+
+def status_em_aberto(incluir_vencidas=True):
+    """Status das contas que podem ser conciliadas"""
+    return STATUS_EM_ABERTO if incluir_vencidas else ('pendente',)
+
 class Extrato(db.Model):
     """Modelo para armazenar extratos bancários importados"""
     id = db.Column(db.Integer, primary_key=True)
     nome_arquivo = db.Column(db.String(255), nullable=False)
     data_upload = db.Column(db.DateTime, default=datetime.utcnow)
+    empresa = db.Column(db.String(50), index=True)  # escopo da conciliação
     banco = db.Column(db.String(100))
     conta = db.Column(db.String(50))
     periodo_inicio = db.Column(db.Date)
@@ -26,6 +43,7 @@ class Extrato(db.Model):
             'id': self.id,
             'nome_arquivo': self.nome_arquivo,
             'data_upload': self.data_upload.isoformat() if self.data_upload else None,
+            'empresa': self.empresa,
             'banco': self.banco,
             'conta': self.conta,
             'periodo_inicio': self.periodo_inicio.isoformat() if self.periodo_inicio else None,
@@ -36,11 +54,19 @@ class Extrato(db.Model):
 
 class Transacao(db.Model):
     """Modelo para armazenar transações individuais do extrato"""
+    __table_args__ = (
+        # Créditos pendentes de cada empresa
+        db.Index('ix_transacao_empresa_status', 'empresa', 'status_conciliacao'),
+        # Os ids são copiados para o arquivo: o SQLite não pode reaproveitá-los
+        {'sqlite_autoincrement': True},
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     extrato_id = db.Column(db.Integer, db.ForeignKey('extrato.id'), nullable=False)
+    empresa = db.Column(db.String(50))  # copiada do extrato
     
     # Dados da transação
-    data_transacao = db.Column(db.Date, nullable=False)
+    data_transacao = db.Column(db.Date, nullable=False, index=True)
     valor = db.Column(db.Numeric(15, 2), nullable=False)
     tipo = db.Column(db.String(20), nullable=False)  # credito, debito
     descricao = db.Column(db.Text)
@@ -52,9 +78,16 @@ class Transacao(db.Model):
     banco_origem = db.Column(db.String(100))
     
     # Status da conciliação
-    status_conciliacao = db.Column(db.String(50), default='pendente')  # pendente, conciliado, divergente
+    status_conciliacao = db.Column(db.String(50), default='pendente', index=True)  # pendente, conciliado, divergente
     confianca_conciliacao = db.Column(db.Float)  # 0.0 a 1.0
     
+    # Reserva temporária usada pela conciliação automática concorrente (SQLite)
+    reservado_por = db.Column(db.String(32))
+    reservado_ate = db.Column(db.DateTime)
+    
+    # Versão da linha, usada na chave do cache de pontuação
+    data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
     # Relacionamento com conciliação
     conciliacoes = db.relationship('Conciliacao', backref='transacao', lazy=True)
     
@@ -65,6 +98,7 @@ class Transacao(db.Model):
         return {
             'id': self.id,
             'extrato_id': self.extrato_id,
+            'empresa': self.empresa,
             'data_transacao': self.data_transacao.isoformat() if self.data_transacao else None,
             'valor': float(self.valor) if self.valor else 0,
             'tipo': self.tipo,
@@ -79,16 +113,32 @@ class Transacao(db.Model):
 
 class ContaReceber(db.Model):
     """Modelo para contas a receber da empresa"""
+    __table_args__ = (
+        # Filtros da busca de sugestões em SQL, separados por empresa
+        db.Index('ix_conta_receber_empresa_status_valor', 'empresa', 'status', 'valor_esperado'),
+        db.Index('ix_conta_receber_empresa_status_vencimento', 'empresa', 'status', 'data_vencimento'),
+        db.Index('ix_conta_receber_empresa_status_criacao', 'empresa', 'status', 'data_criacao'),
+        db.Index('ix_conta_receber_empresa_cpf_cnpj', 'empresa', 'cliente_cpf_cnpj'),
+        # Varredura de vencimentos (todas as empresas)
+        db.Index('ix_conta_receber_status_vencimento', 'status', 'data_vencimento'),
+        # Os ids são copiados para o arquivo: o SQLite não pode reaproveitá-los
+        {'sqlite_autoincrement': True},
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
+    empresa = db.Column(db.String(50))  # escopo da conciliação
     numero_pedido = db.Column(db.String(100))
     cliente_nome = db.Column(db.String(255), nullable=False)
     cliente_cpf_cnpj = db.Column(db.String(20))
     valor_esperado = db.Column(db.Numeric(15, 2), nullable=False)
     data_vencimento = db.Column(db.Date)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
-    status = db.Column(db.String(50), default='pendente')  # pendente, pago, vencido
+    status = db.Column(db.String(50), default='pendente', index=True)  # pendente, pago, vencido
     observacoes = db.Column(db.Text)
     
+    # Versão da linha, usada na chave do cache de pontuação
+    data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
     # Relacionamento com conciliações
     conciliacoes = db.relationship('Conciliacao', backref='conta_receber', lazy=True)
     
@@ -98,6 +148,7 @@ class ContaReceber(db.Model):
     def to_dict(self):
         return {
             'id': self.id,
+            'empresa': self.empresa,
             'numero_pedido': self.numero_pedido,
             'cliente_nome': self.cliente_nome,
             'cliente_cpf_cnpj': self.cliente_cpf_cnpj,
@@ -110,13 +161,22 @@ class ContaReceber(db.Model):
 
 class Conciliacao(db.Model):
     """Modelo para registrar conciliações entre transações e contas a receber"""
+    # Os ids são copiados para o arquivo: o SQLite não pode reaproveitá-los
+    __table_args__ = {'sqlite_autoincrement': True}
+    
     id = db.Column(db.Integer, primary_key=True)
-    transacao_id = db.Column(db.Integer, db.ForeignKey('transacao.id'), nullable=False)
-    conta_receber_id = db.Column(db.Integer, db.ForeignKey('conta_receber.id'), nullable=False)
+    transacao_id = db.Column(db.Integer, db.ForeignKey('transacao.id'), nullable=False, index=True)
+    # Cada conta a receber só pode ser conciliada uma vez
+    conta_receber_id = db.Column(db.Integer, db.ForeignKey('conta_receber.id'), nullable=False, unique=True)
     
     data_conciliacao = db.Column(db.DateTime, default=datetime.utcnow)
     tipo_conciliacao = db.Column(db.String(50), nullable=False)  # automatica, manual
     confianca = db.Column(db.Float)  # 0.0 a 1.0
+    # Fatores da confiança (0.0 a 1.0), como calculados na pontuação do par
+    pontuacao_valor = db.Column(db.Float, index=True)
+    pontuacao_identificacao = db.Column(db.Float)
+    pontuacao_data = db.Column(db.Float)
+    pontuacao_pedido = db.Column(db.Float)
     observacoes = db.Column(db.Text)
     usuario_responsavel = db.Column(db.String(100))
     
@@ -131,10 +191,39 @@ class Conciliacao(db.Model):
             'data_conciliacao': self.data_conciliacao.isoformat() if self.data_conciliacao else None,
             'tipo_conciliacao': self.tipo_conciliacao,
             'confianca': self.confianca,
+            'pontuacao_valor': self.pontuacao_valor,
+            'pontuacao_identificacao': self.pontuacao_identificacao,
+            'pontuacao_data': self.pontuacao_data,
+            'pontuacao_pedido': self.pontuacao_pedido,
             'observacoes': self.observacoes,
             'usuario_responsavel': self.usuario_responsavel
         }
 
+class FaixaVencimento(db.Model):
+    """Totais de contas vencidas por faixa de atraso, recalculados pela varredura"""
+    __table_args__ = (
+        db.UniqueConstraint('empresa', 'faixa', name='uq_faixa_vencimento_empresa_faixa'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    empresa = db.Column(db.String(50))
+    faixa = db.Column(db.String(10), nullable=False)  # 0-30, 31-60, 61-90, 90+
+    quantidade = db.Column(db.Integer, default=0)
+    valor_total = db.Column(db.Numeric(15, 2), default=0)
+    data_referencia = db.Column(db.Date, nullable=False)
+    
+    def __repr__(self):
+        return f'<FaixaVencimento {self.empresa} {self.faixa}>'
+    
+    def to_dict(self):
+        return {
+            'empresa': self.empresa,
+            'faixa': self.faixa,
+            'quantidade': self.quantidade,
+            'valor_total': float(self.valor_total) if self.valor_total else 0,
+            'data_referencia': self.data_referencia.isoformat() if self.data_referencia else None
+        }
+
 class RegraConciliacao(db.Model):
     """Modelo para armazenar regras de conciliação personalizadas"""
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,92 @@
+from sqlalchemy.schema import CreateIndex
+from src.models.conciliacao import db
+import src.models.arquivo  # noqa: F401 (registra as tabelas de arquivo no metadata)
+
+# Atualização do esquema de bancos criados por versões anteriores.
+# create_all só cria tabelas ausentes; aqui as tabelas existentes recebem
+# as colunas, índices e chaves únicas que os modelos ganharam depois.
+# Cada passo confere o banco antes, então o comando pode ser repetido.
+
+# Índices que os modelos deixaram de ter
+INDICES_REMOVIDOS = (
+    # Nenhuma consulta o usava: contains() não é busca por prefixo
+    'ix_conta_receber_empresa_nome_normalizado',
+)
+
+def indice_existe(conexao, nome):
+    """Procura o índice pelo nome (o inspetor do SQLite não lista índices de expressão)"""
+    if conexao.dialect.name == 'sqlite':
+        consulta = db.text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :nome")
+        return conexao.execute(consulta, {'nome': nome}).first() is not None
+    return conexao.execute(db.text('SELECT to_regclass(:nome)'), {'nome': nome}).scalar() is not None
+
+def colunas_unicas_existentes(inspetor, tabela):
+    """Conjuntos de colunas já cobertos por chave ou índice único"""
+    unicas = {tuple(restricao['column_names']) for restricao in inspetor.get_unique_constraints(tabela)}
+    unicas.update(tuple(indice['column_names']) for indice in inspetor.get_indexes(tabela) if indice['unique'])
+    return unicas
+
+def adicionar_colunas(conexao, inspetor, tabela):
+    """ALTER TABLE ... ADD COLUMN para as colunas do modelo ausentes no banco"""
+    existentes = {coluna['name'] for coluna in inspetor.get_columns(tabela.name)}
+    alteracoes = []
+    
+    for coluna in tabela.columns:
+        if coluna.name in existentes:
+            continue
+        if not coluna.nullable and coluna.server_default is None:
+            raise RuntimeError(f'Coluna obrigatória sem valor padrão não pode ser adicionada: {tabela.name}.{coluna.name}')
+        
+        tipo = coluna.type.compile(dialect=conexao.dialect)
+        conexao.execute(db.text(f'ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {tipo}'))
+        alteracoes.append(f'coluna {tabela.name}.{coluna.name}')
+    
+    return alteracoes
+
+def criar_indices(conexao, inspetor, tabela):
+    """Cria os índices e as chaves únicas do modelo ausentes no banco
+    
+    Chaves únicas viram índices únicos (o SQLite não aceita ADD CONSTRAINT).
+    """
+    unicas = colunas_unicas_existentes(inspetor, tabela.name)
+    alteracoes = []
+    
+    for indice in tabela.indexes:
+        if not indice_existe(conexao, indice.name):
+            conexao.execute(CreateIndex(indice))
+            alteracoes.append(f'índice {indice.name}')
+    
+    for restricao in tabela.constraints:
+        if not isinstance(restricao, db.UniqueConstraint):
+            continue
+        colunas = tuple(coluna.name for coluna in restricao.columns)
+        if colunas in unicas:
+            continue
+        
+        nome = restricao.name or f"uq_{tabela.name}_{'_'.join(colunas)}"
+        conexao.execute(CreateIndex(db.Index(nome, *restricao.columns, unique=True)))
+        alteracoes.append(f'índice único {nome}')
+    
+    return alteracoes
+
+def atualizar_esquema():
+    """Cria as tabelas ausentes e atualiza as existentes; devolve as alterações feitas"""
+    db.create_all()
+    alteracoes = []
+    
+    with db.engine.begin() as conexao:
+        inspetor = db.inspect(conexao)
+        for tabela in db.metadata.sorted_tables:
+            alteracoes.extend(adicionar_colunas(conexao, inspetor, tabela))
+        
+        # As colunas novas precisam existir antes dos índices que as usam
+        inspetor = db.inspect(conexao)
+        for tabela in db.metadata.sorted_tables:
+            alteracoes.extend(criar_indices(conexao, inspetor, tabela))
+        
+        for nome in INDICES_REMOVIDOS:
+            if indice_existe(conexao, nome):
+                conexao.execute(db.text(f'DROP INDEX {nome}'))
+                alteracoes.append(f'índice removido {nome}')
+    
+    return alteracoes
@@ -0,0 +1,264 @@
+from flask import Blueprint, request, jsonify
+from src.models.conciliacao import db, Transacao, ContaReceber, Conciliacao
+from src.models.arquivo import TransacaoArquivo, ContaReceberArquivo, ConciliacaoArquivo, PeriodoArquivado
+from src.services.serializacao import colunas_modelo, listar_conciliacoes_completas
+from datetime import datetime, date, timedelta
+import click
+
+arquivo_bp = Blueprint('arquivo', __name__)
+
+def inicio_mes_seguinte(dia):
+    """Retorna o primeiro dia do mês seguinte à data informada"""
+    if dia.month == 12:
+        return date(dia.year + 1, 1, 1)
+    return date(dia.year, dia.month + 1, 1)
+
+def colunas_copiadas(modelo_arquivo):
+    """Nomes das colunas comuns entre a tabela quente e a de arquivo"""
+    return [coluna.name for coluna in modelo_arquivo.__table__.columns if coluna.name != 'data_arquivamento']
+
+def copiar_para_arquivo(modelo, modelo_arquivo, condicao):
+    """Copia em bloco (INSERT ... SELECT) as linhas da tabela quente para o arquivo"""
+    nomes = colunas_copiadas(modelo_arquivo)
+    origem = db.select(*[modelo.__table__.c[nome] for nome in nomes]).where(condicao)
+    db.session.execute(db.insert(modelo_arquivo).from_select(nomes, origem))
+
+def mes_tem_transacoes(inicio, fim):
+    """Verifica se ainda há transações do mês nas tabelas quentes"""
+    return db.session.query(Transacao.id).filter(
+        Transacao.data_transacao >= inicio,
+        Transacao.data_transacao < fim
+    ).first() is not None
+
+def mes_fechado(inicio, fim):
+    """Verifica se não há créditos do mês aguardando conciliação"""
+    abertos = db.session.query(Transacao.id).filter(
+        Transacao.data_transacao >= inicio,
+        Transacao.data_transacao < fim,
+        Transacao.tipo == 'credito',
+        Transacao.status_conciliacao != 'conciliado'
+    ).first()
+    return abertos is None
+
+def arquivar_mes(inicio):
+    """Move um mês conciliado das tabelas quentes para as tabelas de arquivo
+    
+    Se o mês já foi arquivado antes (linhas lançadas depois com data
+    retroativa), os totais do período existente são acumulados.
+    """
+    fim = inicio_mes_seguinte(inicio)
+    
+    transacoes_mes = db.select(Transacao.id).where(
+        Transacao.data_transacao >= inicio,
+        Transacao.data_transacao < fim
+    )
+    contas_mes = db.select(Conciliacao.conta_receber_id).where(Conciliacao.transacao_id.in_(transacoes_mes))
+    contas_arquivadas = db.select(ConciliacaoArquivo.conta_receber_id).where(
+        ConciliacaoArquivo.transacao_id.in_(transacoes_mes)
+    )
+    
+    copiar_para_arquivo(Conciliacao, ConciliacaoArquivo, Conciliacao.transacao_id.in_(transacoes_mes))
+    copiar_para_arquivo(ContaReceber, ContaReceberArquivo, ContaReceber.id.in_(contas_mes))
+    copiar_para_arquivo(Transacao, TransacaoArquivo, Transacao.id.in_(transacoes_mes))
+    
+    # Remove na ordem das chaves estrangeiras: conciliação, conta, transação
+    total_conciliacoes = db.session.execute(
+        db.delete(Conciliacao).where(Conciliacao.transacao_id.in_(transacoes_mes)).execution_options(synchronize_session=False)
+    ).rowcount
+    total_contas = db.session.execute(
+        db.delete(ContaReceber).where(ContaReceber.id.in_(contas_arquivadas)).execution_options(synchronize_session=False)
+    ).rowcount
+    total_transacoes = db.session.execute(
+        db.delete(Transacao).where(Transacao.id.in_(transacoes_mes)).execution_options(synchronize_session=False)
+    ).rowcount
+    
+    periodo = PeriodoArquivado.query.filter_by(mes=inicio.strftime('%Y-%m')).first()
+    if periodo is None:
+        periodo = PeriodoArquivado(
+            mes=inicio.strftime('%Y-%m'),
+            inicio=inicio,
+            fim=fim - timedelta(days=1),
+            total_transacoes=0,
+            total_conciliacoes=0,
+            total_contas=0
+        )
+        db.session.add(periodo)
+    
+    periodo.total_transacoes += total_transacoes
+    periodo.total_conciliacoes += total_conciliacoes
+    periodo.total_contas += total_contas
+    periodo.data_arquivamento = datetime.utcnow()
+    db.session.commit()
+    
+    return periodo
+
+def arquivar_periodos(ate):
+    """Arquiva todos os meses fechados até o mês informado (inclusive)
+    
+    Um mês só é arquivado quando ainda tem transações nas tabelas quentes,
+    todos os seus créditos estão conciliados e ele é anterior ao mês
+    corrente; um mês já arquivado que recebeu lançamentos retroativos é
+    arquivado de novo. Cada mês é movido em sua própria transação, então
+    uma falha não desfaz os meses já arquivados.
+    """
+    hoje = date.today()
+    limite = min(inicio_mes_seguinte(ate), date(hoje.year, hoje.month, 1))
+    
+    primeira_data = db.session.query(db.func.min(Transacao.data_transacao)).scalar()
+    if not primeira_data:
+        return [], []
+    
+    arquivados = []
+    ignorados = []
+    inicio = date(primeira_data.year, primeira_data.month, 1)
+    
+    while inicio < limite:
+        fim = inicio_mes_seguinte(inicio)
+        
+        if not mes_tem_transacoes(inicio, fim):
+            pass
+        elif not mes_fechado(inicio, fim):
+            ignorados.append(inicio.strftime('%Y-%m'))
+        else:
+            try:
+                arquivados.append(arquivar_mes(inicio))
+            except Exception:
+                db.session.rollback()
+                raise
+        
+        inicio = fim
+    
+    return arquivados, ignorados
+
+def fim_arquivo():
+    """Última data coberta pelas tabelas de arquivo"""
+    return db.session.query(db.func.max(PeriodoArquivado.fim)).scalar()
+
+def consulta_precisa_arquivo(data_inicio, data_fim=None):
+    """Indica se o intervalo pedido alcança algum período arquivado
+    
+    Sem nenhuma data, apenas as tabelas quentes são consultadas. Só com
+    data_fim, o intervalo começa no primeiro lançamento e alcança qualquer
+    período arquivado.
+    """
+    if not data_inicio and not data_fim:
+        return False
+    
+    limite = fim_arquivo()
+    if limite is None:
+        return False
+    return not data_inicio or data_inicio <= limite
+
+def listar_conciliacoes_arquivadas(data_inicio=None, data_fim=None, limites_fatores=None):
+    """Lista conciliações arquivadas no intervalo de datas das transações
+    
+    `limites_fatores` ({coluna: limite}) mantém só as conciliações com cada
+    fator abaixo do limite, como na listagem das tabelas quentes.
+    """
+    consulta = db.select(
+        *colunas_modelo(ConciliacaoArquivo), *colunas_modelo(TransacaoArquivo), *colunas_modelo(ContaReceberArquivo)
+    ).select_from(ConciliacaoArquivo).join(
+        TransacaoArquivo, ConciliacaoArquivo.transacao_id == TransacaoArquivo.id
+    ).join(
+        ContaReceberArquivo, ConciliacaoArquivo.conta_receber_id == ContaReceberArquivo.id
+    )
+    
+    if data_inicio:
+        consulta = consulta.where(TransacaoArquivo.data_transacao >= data_inicio)
+    if data_fim:
+        consulta = consulta.where(TransacaoArquivo.data_transacao <= data_fim)
+    for coluna, limite in (limites_fatores or {}).items():
+        consulta = consulta.where(getattr(ConciliacaoArquivo, coluna) < limite)
+    
+    resultado = listar_conciliacoes_completas(
+        consulta.order_by(ConciliacaoArquivo.data_conciliacao.desc()),
+        ConciliacaoArquivo, TransacaoArquivo, ContaReceberArquivo
+    )
+    for item in resultado:
+        item['arquivada'] = True
+    
+    return resultado
+
+def converter_mes(valor):
+    """Converte 'YYYY-MM' para o primeiro dia do mês"""
+    return datetime.strptime(valor, '%Y-%m').date()
+
+@arquivo_bp.route('/executar', methods=['POST'])
+def executar_arquivamento():
+    """Arquiva os meses conciliados e fechados até o mês informado"""
+    try:
+        dados = request.get_json() or {}
+        
+        if not dados.get('ate'):
+            return jsonify({'erro': 'Mês limite (ate) é obrigatório. Use formato YYYY-MM'}), 400
+        
+        try:
+            ate = converter_mes(dados['ate'])
+        except ValueError:
+            return jsonify({'erro': 'Mês limite inválido. Use formato YYYY-MM'}), 400
+        
+        arquivados, ignorados = arquivar_periodos(ate)
+        
+        return jsonify({
+            'sucesso': True,
+            'periodos_arquivados': [periodo.to_dict() for periodo in arquivados],
+            'periodos_com_pendencias': ignorados,
+            'mensagem': f'{len(arquivados)} períodos arquivados'
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'erro': f'Erro ao arquivar períodos: {str(e)}'}), 500
+
+@arquivo_bp.route('/periodos', methods=['GET'])
+def listar_periodos():
+    """Lista os períodos já arquivados"""
+    try:
+        periodos = PeriodoArquivado.query.order_by(PeriodoArquivado.inicio).all()
+        return jsonify({
+            'periodos': [periodo.to_dict() for periodo in periodos]
+        })
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao listar períodos arquivados: {str(e)}'}), 500
+
+@arquivo_bp.route('/transacoes', methods=['GET'])
+def listar_transacoes_arquivadas():
+    """Lista transações arquivadas de um intervalo de datas"""
+    try:
+        try:
+            data_inicio = datetime.strptime(request.args.get('data_inicio', ''), '%Y-%m-%d').date()
+            data_fim = datetime.strptime(request.args.get('data_fim', ''), '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'erro': 'data_inicio e data_fim são obrigatórias. Use formato YYYY-MM-DD'}), 400
+        
+        consulta = TransacaoArquivo.query.filter(
+            TransacaoArquivo.data_transacao >= data_inicio,
+            TransacaoArquivo.data_transacao <= data_fim
+        )
+        
+        extrato_id = request.args.get('extrato_id', type=int)
+        if extrato_id:
+            consulta = consulta.filter(TransacaoArquivo.extrato_id == extrato_id)
+        
+        transacoes = consulta.order_by(TransacaoArquivo.data_transacao.desc()).all()
+        
+        return jsonify({
+            'transacoes': [transacao.to_dict() for transacao in transacoes]
+        })
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao listar transações arquivadas: {str(e)}'}), 500
+
+@arquivo_bp.cli.command('arquivar')
+@click.option('--ate', required=True, help='Último mês a arquivar (YYYY-MM)')
+def comando_arquivar(ate):
+    """Move os meses conciliados e fechados para as tabelas de arquivo"""
+    arquivados, ignorados = arquivar_periodos(converter_mes(ate))
+    
+    for periodo in arquivados:
+        click.echo(f'{periodo.mes}: {periodo.total_transacoes} transações, '
+                   f'{periodo.total_conciliacoes} conciliações, {periodo.total_contas} contas')
+    
+    if ignorados:
+        click.echo(f"Meses com pendências (não arquivados): {', '.join(ignorados)}")
+    
+    click.echo(f'{len(arquivados)} períodos arquivados')
@@ -1,158 +1,204 @@
-from flask import Blueprint, request, jsonify
-from src.models.conciliacao import db, Transacao, ContaReceber, Conciliacao
-from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from src.models.conciliacao import (
+    db, Extrato, Transacao, ContaReceber, Conciliacao, QUALQUER_EMPRESA, STATUS_EM_ABERTO, mesma_empresa
+)
+from src.models.arquivo import TransacaoArquivo, ContaReceberArquivo, ConciliacaoArquivo
+from src.routes.arquivo import consulta_precisa_arquivo, listar_conciliacoes_arquivadas
+from src.services.serializacao import codificador_linhas, colunas_modelo, listar_conciliacoes_completas, resposta_json
+from src.services.pontuacao import (
+    COLUNAS_FATORES, CONFIANCA_MINIMA_CANDIDATO, carregar_contas_pendentes, colunas_fatores,
+    encontrar_correspondencias_automaticas, obter_estatisticas_pontuacao, pontuar_par, sugerir_correspondencias_sql
+)
+from src.services.vencimento import status_conta_em_aberto
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, date
 from decimal import Decimal
-import re
+import csv
+import io
+import os
+import tempfile
+import uuid
 
 conciliacao_bp = Blueprint('conciliacao', __name__)
 
-def calcular_similaridade_texto(texto1, texto2):
-    """Calcula similaridade básica entre dois textos"""
-    if not texto1 or not texto2:
-        return 0.0
-    
-    texto1 = texto1.lower().strip()
-    texto2 = texto2.lower().strip()
-    
-    # Similaridade exata
-    if texto1 == texto2:
-        return 1.0
-    
-    # Verifica se um texto contém o outro
-    if texto1 in texto2 or texto2 in texto1:
-        return 0.8
-    
-    # Conta palavras em comum
-    palavras1 = set(re.findall(r'\w+', texto1))
-    palavras2 = set(re.findall(r'\w+', texto2))
-    
-    if not palavras1 or not palavras2:
-        return 0.0
-    
-    intersecao = len(palavras1.intersection(palavras2))
-    uniao = len(palavras1.union(palavras2))
-    
-    return intersecao / uniao if uniao > 0 else 0.0
+# Transações reservadas por vez na conciliação automática
+TAMANHO_LOTE_AUTOMATICA = 200
 
-def calcular_similaridade_valor(valor1, valor2, tolerancia_percentual=0.05):
-    """Calcula similaridade entre valores com tolerância"""
-    if valor1 == valor2:
-        return 1.0
-    
-    diferenca = abs(valor1 - valor2)
-    maior_valor = max(valor1, valor2)
+# Validade da reserva de transações no SQLite (libera reservas de execuções interrompidas)
+DURACAO_RESERVA = timedelta(minutes=5)
+
+# Linhas lidas por vez do cursor do banco durante a exportação
+TAMANHO_LOTE_EXPORTACAO = 2000
+
+# Tamanho dos blocos enviados na resposta HTTP da exportação XLSX
+TAMANHO_BLOCO_RESPOSTA = 64 * 1024
+
+# Linhas de dados por planilha do XLSX (limite do Excel: 1.048.576 linhas, com o cabeçalho)
+LINHAS_POR_PLANILHA_XLSX = 1048575
+
+# Colunas exportadas (cabeçalho, coluna)
+COLUNAS_EXPORTACAO = [
+    ('conciliacao_id', Conciliacao.id),
+    ('data_conciliacao', Conciliacao.data_conciliacao),
+    ('tipo_conciliacao', Conciliacao.tipo_conciliacao),
+    ('confianca', Conciliacao.confianca),
+    ('pontuacao_valor', Conciliacao.pontuacao_valor),
+    ('pontuacao_identificacao', Conciliacao.pontuacao_identificacao),
+    ('pontuacao_data', Conciliacao.pontuacao_data),
+    ('pontuacao_pedido', Conciliacao.pontuacao_pedido),
+    ('usuario_responsavel', Conciliacao.usuario_responsavel),
+    ('observacoes', Conciliacao.observacoes),
+    ('transacao_id', Transacao.id),
+    ('extrato_id', Transacao.extrato_id),
+    ('data_transacao', Transacao.data_transacao),
+    ('valor', Transacao.valor),
+    ('descricao', Transacao.descricao),
+    ('documento', Transacao.documento),
+    ('nome_pagador', Transacao.nome_pagador),
+    ('cpf_cnpj_pagador', Transacao.cpf_cnpj_pagador),
+    ('status_conciliacao', Transacao.status_conciliacao),
+    ('conta_receber_id', ContaReceber.id),
+    ('numero_pedido', ContaReceber.numero_pedido),
+    ('cliente_nome', ContaReceber.cliente_nome),
+    ('cliente_cpf_cnpj', ContaReceber.cliente_cpf_cnpj),
+    ('valor_esperado', ContaReceber.valor_esperado),
+    ('data_vencimento', ContaReceber.data_vencimento),
+    ('status_conta', ContaReceber.status),
+]
+
+def usa_skip_locked():
+    """Indica se o banco suporta SELECT ... FOR UPDATE SKIP LOCKED"""
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+def reservar_transacoes(token, apos_id, tamanho_lote, empresa=QUALQUER_EMPRESA, transacoes_ids=None):
+    """Reserva um lote de créditos pendentes para esta execução
     
-    if maior_valor == 0:
-        return 0.0
+    No PostgreSQL as linhas são travadas com FOR UPDATE SKIP LOCKED até o
+    commit do lote, e execuções simultâneas pegam linhas diferentes. No
+    SQLite a reserva é feita com as colunas reservado_por/reservado_ate em
+    um único UPDATE. Transações de extratos em exclusão não são reservadas.
+    """
+    condicoes = [
+        Transacao.status_conciliacao == 'pendente',
+        Transacao.tipo == 'credito',
+        Transacao.id > apos_id,
+        ~db.exists().where(Extrato.id == Transacao.extrato_id, Extrato.status == 'excluindo')
+    ]
+    if empresa is not QUALQUER_EMPRESA:
+        condicoes.append(mesma_empresa(Transacao.empresa, empresa))
+    if transacoes_ids is not None:
+        condicoes.append(Transacao.id.in_(transacoes_ids))
     
-    percentual_diferenca = diferenca / maior_valor
+    if usa_skip_locked():
+        return db.session.scalars(
+            db.select(Transacao)
+            .where(*condicoes)
+            .order_by(Transacao.id)
+            .limit(tamanho_lote)
+            .with_for_update(skip_locked=True)
+        ).all()
     
-    if percentual_diferenca <= tolerancia_percentual:
-        return 1.0 - percentual_diferenca
+    agora = datetime.utcnow()
+    livres = db.select(Transacao.id).where(
+        *condicoes,
+        db.or_(Transacao.reservado_ate.is_(None), Transacao.reservado_ate < agora)
+    ).order_by(Transacao.id).limit(tamanho_lote)
+    # A reserva não altera a transação: mantém a versão usada pelo cache de pontuação
+    db.session.execute(
+        db.update(Transacao)
+        .where(Transacao.id.in_(livres.scalar_subquery()))
+        .values(reservado_por=token, reservado_ate=agora + DURACAO_RESERVA, data_atualizacao=Transacao.data_atualizacao)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
     
-    return 0.0
+    return Transacao.query.filter(
+        Transacao.reservado_por == token,
+        Transacao.id > apos_id
+    ).order_by(Transacao.id).all()
 
-def calcular_similaridade_data(data1, data2, tolerancia_dias=7):
-    """Calcula similaridade entre datas com tolerância"""
-    if data1 == data2:
-        return 1.0
+def liberar_transacoes(token):
+    """Libera as reservas feitas por esta execução (SQLite)"""
+    if usa_skip_locked():
+        return
     
-    diferenca_dias = abs((data1 - data2).days)
-    
-    if diferenca_dias <= tolerancia_dias:
-        return 1.0 - (diferenca_dias / tolerancia_dias)
-    
-    return 0.0
+    db.session.execute(
+        db.update(Transacao)
+        .where(Transacao.reservado_por == token)
+        .values(reservado_por=None, reservado_ate=None, data_atualizacao=Transacao.data_atualizacao)
+        .execution_options(synchronize_session=False)
+    )
 
-def encontrar_correspondencias_automaticas(transacao):
-    """Encontra possíveis correspondências para uma transação"""
-    correspondencias = []
+def reservar_conta(conta_id):
+    """Marca a conta como paga somente se ainda estiver em aberto (pendente ou vencida)
     
-    # Busca contas a receber pendentes
-    contas_pendentes = ContaReceber.query.filter_by(status='pendente').all()
+    O UPDATE condicional é atômico nos dois bancos: se outra execução já
+    pegou a conta, nenhuma linha é alterada e a conta é descartada.
+    """
+    if usa_skip_locked():
+        livre = db.session.execute(
+            db.select(ContaReceber.id)
+            .where(ContaReceber.id == conta_id, ContaReceber.status.in_(STATUS_EM_ABERTO))
+            .with_for_update(skip_locked=True)
+        ).first()
+        if livre is None:
+            return False
     
-    for conta in contas_pendentes:
-        confianca_total = 0.0
-        fatores = []
-        
-        # Similaridade de valor (peso 40%)
-        sim_valor = calcular_similaridade_valor(float(transacao.valor), float(conta.valor_esperado))
-        confianca_total += sim_valor * 0.4
-        fatores.append(f"Valor: {sim_valor:.2f}")
-        
-        # Similaridade de nome/CPF (peso 30%)
-        sim_nome = 0.0
-        if transacao.nome_pagador and conta.cliente_nome:
-            sim_nome = calcular_similaridade_texto(transacao.nome_pagador, conta.cliente_nome)
-        
-        sim_cpf = 0.0
-        if transacao.cpf_cnpj_pagador and conta.cliente_cpf_cnpj:
-            sim_cpf = 1.0 if transacao.cpf_cnpj_pagador == conta.cliente_cpf_cnpj else 0.0
-        
-        sim_identificacao = max(sim_nome, sim_cpf)
-        confianca_total += sim_identificacao * 0.3
-        fatores.append(f"Identificação: {sim_identificacao:.2f}")
-        
-        # Similaridade de data (peso 20%)
-        sim_data = 0.0
-        if conta.data_vencimento:
-            sim_data = calcular_similaridade_data(transacao.data_transacao, conta.data_vencimento)
-        else:
-            # Se não há data de vencimento, considera proximidade com data de criação
-            sim_data = calcular_similaridade_data(transacao.data_transacao, conta.data_criacao.date(), tolerancia_dias=30)
-        
-        confianca_total += sim_data * 0.2
-        fatores.append(f"Data: {sim_data:.2f}")
-        
-        # Busca por número do pedido na descrição (peso 10%)
-        sim_pedido = 0.0
-        if conta.numero_pedido and transacao.descricao:
-            if conta.numero_pedido in transacao.descricao:
-                sim_pedido = 1.0
-        
-        confianca_total += sim_pedido * 0.1
-        fatores.append(f"Pedido: {sim_pedido:.2f}")
-        
-        # Adiciona à lista se confiança mínima
-        if confianca_total >= 0.3:  # 30% de confiança mínima
-            correspondencias.append({
-                'conta': conta,
-                'confianca': confianca_total,
-                'fatores': fatores
-            })
+    resultado = db.session.execute(
+        db.update(ContaReceber)
+        .where(ContaReceber.id == conta_id, ContaReceber.status.in_(STATUS_EM_ABERTO))
+        .values(status='pago')
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount == 1
+
+def executar_conciliacao_automatica(confianca_minima, tamanho_lote=TAMANHO_LOTE_AUTOMATICA, empresa=QUALQUER_EMPRESA,
+                                    transacoes_ids=None, incluir_vencidas=True):
+    """Concilia os créditos pendentes em lotes reservados
     
-    # Ordena por confiança decrescente
-    correspondencias.sort(key=lambda x: x['confianca'], reverse=True)
+    Várias execuções podem rodar ao mesmo tempo (outros usuários ou workers):
+    cada uma trabalha apenas nas transações que conseguiu reservar, e cada
+    conta a receber só é usada por quem conseguir marcá-la como paga.
+    As contas pendentes de cada empresa são carregadas uma vez por lote e
+    cada transação pontua apenas a melhor candidata da própria empresa.
+    Com `empresa`, só os créditos dessa empresa são processados; com
+    `transacoes_ids`, só essas transações (conciliação incremental da
+    ingestão em tempo real). Sem `incluir_vencidas`, contas já marcadas como
+    vencidas ficam de fora. Devolve as
+    conciliações feitas e a contagem de pares avaliados/podados.
+    """
+    token = uuid.uuid4().hex
+    ultimo_id = 0
+    resultados = []
+    estatisticas = {'pares_avaliados': 0, 'pares_podados': 0}
     
-    return correspondencias
-
-@conciliacao_bp.route('/automatica', methods=['POST'])
-def conciliacao_automatica():
-    """Executa conciliação automática para transações pendentes"""
     try:
-        dados = request.get_json() or {}
-        confianca_minima = dados.get('confianca_minima', 0.8)  # 80% de confiança mínima para conciliação automática
-        
-        # Busca transações pendentes de crédito
-        transacoes_pendentes = Transacao.query.filter_by(
-            status_conciliacao='pendente',
-            tipo='credito'
-        ).all()
-        
-        conciliacoes_realizadas = 0
-        resultados = []
-        
-        for transacao in transacoes_pendentes:
-            correspondencias = encontrar_correspondencias_automaticas(transacao)
+        while True:
+            lote = reservar_transacoes(token, ultimo_id, tamanho_lote, empresa, transacoes_ids)
+            if not lote:
+                break
             
-            if correspondencias and correspondencias[0]['confianca'] >= confianca_minima:
-                # Concilia automaticamente
+            contas_por_empresa = {}
+            
+            for transacao in lote:
+                if transacao.empresa not in contas_por_empresa:
+                    contas_por_empresa[transacao.empresa] = carregar_contas_pendentes(transacao.empresa, incluir_vencidas)
+                contas = contas_por_empresa[transacao.empresa]
+                
+                correspondencias = encontrar_correspondencias_automaticas(
+                    transacao, limite=1, contas=contas, estatisticas=estatisticas,
+                    piso=max(confianca_minima, CONFIANCA_MINIMA_CANDIDATO)
+                )
+                
+                if not correspondencias or correspondencias[0]['confianca'] < confianca_minima:
+                    continue
+                
                 melhor_correspondencia = correspondencias[0]
                 conta = melhor_correspondencia['conta']
                 
-                # Verifica se a conta já não foi conciliada
-                conciliacao_existente = Conciliacao.query.filter_by(conta_receber_id=conta.id).first()
-                if conciliacao_existente:
+                # A conta sai da lista do lote, conciliada aqui ou por outra execução
+                contas.remove(conta)
+                if not reservar_conta(conta.id):
                     continue
                 
                 # Cria conciliação
@@ -161,30 +207,56 @@ def conciliacao_automatica():
                     conta_receber_id=conta.id,
                     tipo_conciliacao='automatica',
                     confianca=melhor_correspondencia['confianca'],
-                    observacoes=f"Conciliação automática. Fatores: {', '.join(melhor_correspondencia['fatores'])}"
+                    **colunas_fatores(melhor_correspondencia['pontuacoes']),
+                    observacoes='Conciliação automática'
                 )
                 
                 # Atualiza status
                 transacao.status_conciliacao = 'conciliado'
                 transacao.confianca_conciliacao = melhor_correspondencia['confianca']
-                conta.status = 'pago'
                 
                 db.session.add(conciliacao)
-                conciliacoes_realizadas += 1
                 
                 resultados.append({
                     'transacao_id': transacao.id,
                     'conta_id': conta.id,
                     'confianca': melhor_correspondencia['confianca'],
+                    'pontuacoes': colunas_fatores(melhor_correspondencia['pontuacoes']),
                     'fatores': melhor_correspondencia['fatores']
                 })
-        
+            
+            ultimo_id = lote[-1].id
+            liberar_transacoes(token)
+            db.session.commit()
+    
+    except Exception:
+        db.session.rollback()
+        liberar_transacoes(token)
         db.session.commit()
+        raise
+    
+    return resultados, estatisticas
+
+@conciliacao_bp.route('/automatica', methods=['POST'])
+def conciliacao_automatica():
+    """Executa conciliação automática para transações pendentes"""
+    try:
+        dados = request.get_json() or {}
+        confianca_minima = dados.get('confianca_minima', 0.8)  # 80% de confiança mínima para conciliação automática
+        # Sem 'empresa', processa todas (cada crédito com as contas da própria empresa)
+        empresa = dados['empresa'] if 'empresa' in dados else QUALQUER_EMPRESA
+        incluir_vencidas = dados.get('incluir_vencidas', True)
+        
+        resultados, estatisticas = executar_conciliacao_automatica(
+            confianca_minima, empresa=empresa, incluir_vencidas=incluir_vencidas
+        )
+        conciliacoes_realizadas = len(resultados)
         
         return jsonify({
             'sucesso': True,
             'conciliacoes_realizadas': conciliacoes_realizadas,
             'resultados': resultados,
+            'estatisticas': estatisticas,
             'mensagem': f'{conciliacoes_realizadas} conciliações automáticas realizadas'
         })
         
@@ -192,6 +264,11 @@ def conciliacao_automatica():
         db.session.rollback()
         return jsonify({'erro': f'Erro na conciliação automática: {str(e)}'}), 500
 
+@conciliacao_bp.route('/estatisticas-pontuacao', methods=['GET'])
+def estatisticas_pontuacao():
+    """Pares avaliados e podados pela seleção de melhores desde o início do processo"""
+    return jsonify(obter_estatisticas_pontuacao())
+
 @conciliacao_bp.route('/sugestoes/<int:transacao_id>', methods=['GET'])
 def obter_sugestoes(transacao_id):
     """Obtém sugestões de conciliação para uma transação específica"""
@@ -201,13 +278,21 @@ def obter_sugestoes(transacao_id):
         if transacao.tipo != 'credito':
             return jsonify({'erro': 'Apenas transações de crédito podem ser conciliadas'}), 400
         
-        correspondencias = encontrar_correspondencias_automaticas(transacao)
+        # incluir_vencidas=false sugere apenas contas ainda dentro do vencimento
+        incluir_vencidas = request.args.get('incluir_vencidas', 'true').lower() != 'false'
+        
+        # modo=python mantém a varredura completa em Python (útil para comparar resultados)
+        if request.args.get('modo') == 'python':
+            correspondencias = encontrar_correspondencias_automaticas(transacao, limite=5, incluir_vencidas=incluir_vencidas)
+        else:
+            correspondencias = sugerir_correspondencias_sql(transacao, limite=5, incluir_vencidas=incluir_vencidas)
         
         sugestoes = []
-        for corresp in correspondencias[:5]:  # Máximo 5 sugestões
+        for corresp in correspondencias:  # Máximo 5 sugestões
             sugestoes.append({
                 'conta': corresp['conta'].to_dict(),
                 'confianca': corresp['confianca'],
+                'pontuacoes': colunas_fatores(corresp['pontuacoes']),
                 'fatores': corresp['fatores']
             })
         
@@ -247,14 +332,15 @@ def conciliacao_manual():
         if conciliacao_existente:
             return jsonify({'erro': 'Conciliação já existe entre esta transação e conta'}), 400
         
-        # Calcula confiança da conciliação manual
-        correspondencias = encontrar_correspondencias_automaticas(transacao)
-        confianca = 0.5  # Confiança padrão para conciliação manual
+        if Conciliacao.query.filter_by(conta_receber_id=conta_receber_id).first():
+            return jsonify({'erro': 'Conta a receber já conciliada com outra transação'}), 400
         
-        for corresp in correspondencias:
-            if corresp['conta'].id == conta_receber_id:
-                confianca = corresp['confianca']
-                break
+        if transacao.empresa != conta.empresa:
+            return jsonify({'erro': 'Transação e conta a receber pertencem a empresas diferentes'}), 400
+        
+        # Confiança do par escolhido (reaproveita a pontuação vista nas sugestões)
+        pontuacao = pontuar_par(transacao, conta)
+        confianca = pontuacao['confianca']
         
         # Cria conciliação
         conciliacao = Conciliacao(
@@ -262,6 +348,7 @@ def conciliacao_manual():
             conta_receber_id=conta_receber_id,
             tipo_conciliacao='manual',
             confianca=confianca,
+            **colunas_fatores(pontuacao['pontuacoes']),
             observacoes=observacoes,
             usuario_responsavel=dados.get('usuario', 'Sistema')
         )
@@ -280,44 +367,277 @@ def conciliacao_manual():
             'mensagem': 'Conciliação manual realizada com sucesso'
         })
         
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'erro': 'Conta a receber já conciliada com outra transação'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'erro': f'Erro na conciliação manual: {str(e)}'}), 500
 
 @conciliacao_bp.route('/listar', methods=['GET'])
 def listar_conciliacoes():
-    """Lista todas as conciliações realizadas"""
+    """Lista as conciliações realizadas
+    
+    Sem intervalo de datas, consulta apenas as tabelas quentes. Quando o
+    intervalo alcança um período arquivado (só com data_fim, desde o
+    primeiro lançamento), inclui também o arquivo.
+    Parâmetros <coluna>_abaixo_de (ex.: pontuacao_valor_abaixo_de=1.0)
+    filtram as conciliações com o fator abaixo do limite.
+    """
     try:
-        conciliacoes = db.session.query(Conciliacao).join(Transacao).join(ContaReceber).order_by(Conciliacao.data_conciliacao.desc()).all()
+        filtros = {}
+        for campo in ('data_inicio', 'data_fim'):
+            if request.args.get(campo):
+                try:
+                    filtros[campo] = datetime.strptime(request.args[campo], '%Y-%m-%d').date()
+                except ValueError:
+                    return jsonify({'erro': f'{campo} inválida. Use formato YYYY-MM-DD'}), 400
+        
+        limites_fatores = {}
+        for coluna in COLUNAS_FATORES:
+            if request.args.get(f'{coluna}_abaixo_de'):
+                try:
+                    limites_fatores[coluna] = float(request.args[f'{coluna}_abaixo_de'])
+                except ValueError:
+                    return jsonify({'erro': f'{coluna}_abaixo_de inválido'}), 400
+        
+        consulta = db.select(
+            *colunas_modelo(Conciliacao), *colunas_modelo(Transacao), *colunas_modelo(ContaReceber)
+        ).select_from(Conciliacao).join(
+            Transacao, Conciliacao.transacao_id == Transacao.id
+        ).join(
+            ContaReceber, Conciliacao.conta_receber_id == ContaReceber.id
+        )
+        if filtros.get('data_inicio'):
+            consulta = consulta.where(Transacao.data_transacao >= filtros['data_inicio'])
+        if filtros.get('data_fim'):
+            consulta = consulta.where(Transacao.data_transacao <= filtros['data_fim'])
+        for coluna, limite in limites_fatores.items():
+            consulta = consulta.where(getattr(Conciliacao, coluna) < limite)
+        
+        resultado = listar_conciliacoes_completas(
+            consulta.order_by(Conciliacao.data_conciliacao.desc()), Conciliacao, Transacao, ContaReceber
+        )
         
-        resultado = []
-        for conciliacao in conciliacoes:
-            item = conciliacao.to_dict()
-            item['transacao'] = conciliacao.transacao.to_dict()
-            item['conta_receber'] = conciliacao.conta_receber.to_dict()
-            resultado.append(item)
+        if consulta_precisa_arquivo(filtros.get('data_inicio'), filtros.get('data_fim')):
+            resultado.extend(listar_conciliacoes_arquivadas(filtros.get('data_inicio'), filtros.get('data_fim'), limites_fatores))
         
-        return jsonify({
+        return resposta_json({
             'conciliacoes': resultado
         })
         
     except Exception as e:
         return jsonify({'erro': f'Erro ao listar conciliações: {str(e)}'}), 500
 
+def selecionar_exportacao(modelo_conciliacao, modelo_transacao, modelo_conta, data_inicio=None, data_fim=None,
+                          extrato_id=None, tipo_conciliacao=None, empresa=None):
+    """SELECT das COLUNAS_EXPORTACAO sobre as tabelas quentes ou as de arquivo (mesmos nomes de colunas)"""
+    modelos = {Conciliacao: modelo_conciliacao, Transacao: modelo_transacao, ContaReceber: modelo_conta}
+    consulta = db.select(*[
+        modelos[coluna.class_].__table__.c[coluna.key].label(cabecalho)
+        for cabecalho, coluna in COLUNAS_EXPORTACAO
+    ]).select_from(modelo_conciliacao).join(
+        modelo_transacao, modelo_conciliacao.transacao_id == modelo_transacao.id
+    ).join(
+        modelo_conta, modelo_conciliacao.conta_receber_id == modelo_conta.id
+    )
+    
+    if data_inicio:
+        consulta = consulta.where(modelo_transacao.data_transacao >= data_inicio)
+    if data_fim:
+        consulta = consulta.where(modelo_transacao.data_transacao <= data_fim)
+    if extrato_id:
+        consulta = consulta.where(modelo_transacao.extrato_id == extrato_id)
+    if tipo_conciliacao:
+        consulta = consulta.where(modelo_conciliacao.tipo_conciliacao == tipo_conciliacao)
+    if empresa:
+        consulta = consulta.where(modelo_transacao.empresa == empresa)
+    
+    return consulta
+
+def montar_consulta_exportacao(**filtros):
+    """Monta a consulta de exportação com os filtros informados
+    
+    Como em /listar, quando o intervalo de datas alcança um período
+    arquivado (só com data_fim, desde o primeiro lançamento) as tabelas de
+    arquivo entram na mesma consulta (UNION ALL), ordenada pelo id da
+    conciliação.
+    """
+    consulta = selecionar_exportacao(Conciliacao, Transacao, ContaReceber, **filtros)
+    
+    if consulta_precisa_arquivo(filtros.get('data_inicio'), filtros.get('data_fim')):
+        consulta = db.union_all(
+            consulta, selecionar_exportacao(ConciliacaoArquivo, TransacaoArquivo, ContaReceberArquivo, **filtros)
+        )
+    
+    # yield_per usa cursor do lado do servidor (PostgreSQL) e mantém a memória constante
+    return consulta.order_by(db.literal_column('conciliacao_id')).execution_options(yield_per=TAMANHO_LOTE_EXPORTACAO)
+
+def formatar_celula_csv(valor):
+    """Converte um valor do banco para texto no CSV"""
+    if valor is None:
+        return ''
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+def gerar_csv_exportacao(consulta):
+    """Gera o CSV da exportação em blocos, sem montar o arquivo em memória"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([cabecalho for cabecalho, _ in COLUNAS_EXPORTACAO])
+    
+    for particao in db.session.execute(consulta).partitions():
+        for linha in particao:
+            writer.writerow([formatar_celula_csv(valor) for valor in linha])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def gerar_xlsx_exportacao(consulta, xlsxwriter, linhas_por_planilha=LINHAS_POR_PLANILHA_XLSX):
+    """Gera o XLSX em modo de memória constante e envia o arquivo em blocos
+    
+    Ao atingir o limite de linhas do Excel, continua em uma nova planilha
+    (Conciliacoes_2, Conciliacoes_3...), cada uma com o cabeçalho.
+    """
+    descritor, caminho = tempfile.mkstemp(suffix='.xlsx')
+    os.close(descritor)
+    
+    try:
+        # constant_memory grava cada linha no disco assim que a próxima começa;
+        # textos do usuário ('=...', URLs) ficam como texto, nunca fórmula ou link
+        workbook = xlsxwriter.Workbook(caminho, {
+            'constant_memory': True,
+            'strings_to_formulas': False,
+            'strings_to_urls': False
+        })
+        formato_data = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        formato_data_hora = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+        
+        total_planilhas = 0
+        numero_linha = linhas_por_planilha + 1
+        for particao in db.session.execute(consulta).partitions():
+            for linha in particao:
+                if numero_linha > linhas_por_planilha:
+                    total_planilhas += 1
+                    planilha = workbook.add_worksheet(
+                        'Conciliacoes' if total_planilhas == 1 else f'Conciliacoes_{total_planilhas}'
+                    )
+                    planilha.write_row(0, 0, [cabecalho for cabecalho, _ in COLUNAS_EXPORTACAO])
+                    numero_linha = 1
+                
+                for numero_coluna, valor in enumerate(linha):
+                    if valor is None:
+                        continue
+                    if isinstance(valor, datetime):
+                        planilha.write_datetime(numero_linha, numero_coluna, valor, formato_data_hora)
+                    elif isinstance(valor, date):
+                        planilha.write_datetime(numero_linha, numero_coluna, valor, formato_data)
+                    elif isinstance(valor, Decimal):
+                        planilha.write_number(numero_linha, numero_coluna, float(valor))
+                    elif isinstance(valor, str):
+                        planilha.write_string(numero_linha, numero_coluna, valor)
+                    else:
+                        planilha.write(numero_linha, numero_coluna, valor)
+                numero_linha += 1
+        
+        # Exportação vazia: só a planilha com o cabeçalho
+        if total_planilhas == 0:
+            workbook.add_worksheet('Conciliacoes').write_row(0, 0, [cabecalho for cabecalho, _ in COLUNAS_EXPORTACAO])
+        
+        workbook.close()
+        
+        with open(caminho, 'rb') as arquivo:
+            while True:
+                bloco = arquivo.read(TAMANHO_BLOCO_RESPOSTA)
+                if not bloco:
+                    break
+                yield bloco
+    finally:
+        os.remove(caminho)
+
+@conciliacao_bp.route('/exportar/<formato>', methods=['GET'])
+def exportar_conciliacoes(formato):
+    """Exporta as conciliações com transação e conta a receber (CSV ou XLSX)
+    
+    Filtros: data_inicio e data_fim (data da transação), extrato_id,
+    empresa e status, que é o tipo da conciliação (automatica ou manual);
+    as transações e contas exportadas estão sempre conciliadas e pagas.
+    """
+    try:
+        if formato not in ('csv', 'xlsx'):
+            return jsonify({'erro': 'Formato de exportação inválido. Use csv ou xlsx'}), 400
+        
+        filtros = {}
+        for campo in ('data_inicio', 'data_fim'):
+            if request.args.get(campo):
+                try:
+                    filtros[campo] = datetime.strptime(request.args[campo], '%Y-%m-%d').date()
+                except ValueError:
+                    return jsonify({'erro': f'{campo} inválida. Use formato YYYY-MM-DD'}), 400
+        
+        filtros['extrato_id'] = request.args.get('extrato_id', type=int)
+        filtros['tipo_conciliacao'] = request.args.get('status')
+        filtros['empresa'] = request.args.get('empresa')
+        
+        consulta = montar_consulta_exportacao(**filtros)
+        nome_arquivo = f"conciliacoes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+        cabecalhos = {'Content-Disposition': f'attachment; filename={nome_arquivo}'}
+        
+        if formato == 'csv':
+            return Response(
+                stream_with_context(gerar_csv_exportacao(consulta)),
+                mimetype='text/csv',
+                headers=cabecalhos
+            )
+        
+        try:
+            import xlsxwriter
+        except ImportError:
+            return jsonify({'erro': 'Exportação XLSX requer o pacote XlsxWriter'}), 501
+        
+        return Response(
+            stream_with_context(gerar_xlsx_exportacao(consulta, xlsxwriter)),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            headers=cabecalhos
+        )
+        
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao exportar conciliações: {str(e)}'}), 500
+
 @conciliacao_bp.route('/pendentes', methods=['GET'])
 def listar_pendentes():
-    """Lista transações e contas pendentes de conciliação"""
+    """Lista transações pendentes e contas em aberto (opcionalmente de uma empresa)"""
     try:
-        transacoes_pendentes = Transacao.query.filter_by(
-            status_conciliacao='pendente',
-            tipo='credito'
-        ).order_by(Transacao.data_transacao.desc()).all()
-        
-        contas_pendentes = ContaReceber.query.filter_by(status='pendente').order_by(ContaReceber.data_vencimento).all()
-        
-        return jsonify({
-            'transacoes_pendentes': [t.to_dict() for t in transacoes_pendentes],
-            'contas_pendentes': [c.to_dict() for c in contas_pendentes],
+        consulta_transacoes = db.select(*colunas_modelo(Transacao)).where(
+            Transacao.status_conciliacao == 'pendente',
+            Transacao.tipo == 'credito'
+        )
+        consulta_contas = db.select(*colunas_modelo(ContaReceber)).where(ContaReceber.status.in_(STATUS_EM_ABERTO))
+        
+        empresa = request.args.get('empresa')
+        if empresa:
+            consulta_transacoes = consulta_transacoes.where(Transacao.empresa == empresa)
+            consulta_contas = consulta_contas.where(ContaReceber.empresa == empresa)
+        
+        # Linhas convertidas direto das tuplas da consulta (mesmo formato do to_dict)
+        codificar_transacao = codificador_linhas(Transacao)
+        codificar_conta = codificador_linhas(ContaReceber)
+        transacoes_pendentes = [
+            codificar_transacao(linha)
+            for linha in db.session.execute(consulta_transacoes.order_by(Transacao.data_transacao.desc()))
+        ]
+        contas_pendentes = [
+            codificar_conta(linha)
+            for linha in db.session.execute(consulta_contas.order_by(ContaReceber.data_vencimento))
+        ]
+        
+        return resposta_json({
+            'transacoes_pendentes': transacoes_pendentes,
+            'contas_pendentes': contas_pendentes,
             'total_transacoes': len(transacoes_pendentes),
             'total_contas': len(contas_pendentes)
         })
@@ -334,7 +654,7 @@ def desfazer_conciliacao(conciliacao_id):
         # Reverte status
         conciliacao.transacao.status_conciliacao = 'pendente'
         conciliacao.transacao.confianca_conciliacao = None
-        conciliacao.conta_receber.status = 'pendente'
+        conciliacao.conta_receber.status = status_conta_em_aberto(conciliacao.conta_receber.data_vencimento)
         
         db.session.delete(conciliacao)
         db.session.commit()
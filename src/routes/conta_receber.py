@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
-from src.models.conciliacao import db, ContaReceber
+from src.models.conciliacao import db, ContaReceber, STATUS_EM_ABERTO
+from src.services.vencimento import executar_varredura_vencimento, obter_faixas_vencimento
 from datetime import datetime
 from decimal import Decimal
+import click
 
 conta_receber_bp = Blueprint('conta_receber', __name__)
 
@@ -37,6 +39,7 @@ def criar_conta_receber():
         
         # Cria conta a receber
         conta = ContaReceber(
+            empresa=dados.get('empresa'),
             numero_pedido=dados.get('numero_pedido'),
             cliente_nome=dados['cliente_nome'],
             cliente_cpf_cnpj=dados.get('cliente_cpf_cnpj'),
@@ -65,9 +68,13 @@ def listar_contas_receber():
         # Parâmetros de filtro
         status = request.args.get('status')
         cliente = request.args.get('cliente')
+        empresa = request.args.get('empresa')
         
         query = ContaReceber.query
         
+        if empresa:
+            query = query.filter(ContaReceber.empresa == empresa)
+        
         if status:
             query = query.filter(ContaReceber.status == status)
         
@@ -105,6 +112,9 @@ def atualizar_conta_receber(conta_id):
             return jsonify({'erro': 'Dados não fornecidos'}), 400
         
         # Atualiza campos se fornecidos
+        if 'empresa' in dados:
+            conta.empresa = dados['empresa']
+        
         if 'numero_pedido' in dados:
             conta.numero_pedido = dados['numero_pedido']
         
@@ -166,9 +176,15 @@ def deletar_conta_receber(conta_id):
 
 @conta_receber_bp.route('/pendentes', methods=['GET'])
 def listar_contas_pendentes():
-    """Lista apenas contas a receber pendentes"""
+    """Lista apenas contas a receber em aberto, pendentes ou vencidas (opcionalmente de uma empresa)"""
     try:
-        contas = ContaReceber.query.filter_by(status='pendente').order_by(ContaReceber.data_vencimento).all()
+        query = ContaReceber.query.filter(ContaReceber.status.in_(STATUS_EM_ABERTO))
+        
+        empresa = request.args.get('empresa')
+        if empresa:
+            query = query.filter(ContaReceber.empresa == empresa)
+        
+        contas = query.order_by(ContaReceber.data_vencimento).all()
         
         return jsonify({
             'contas': [conta.to_dict() for conta in contas],
@@ -178,3 +194,40 @@ def listar_contas_pendentes():
     except Exception as e:
         return jsonify({'erro': f'Erro ao listar contas pendentes: {str(e)}'}), 500
 
+@conta_receber_bp.route('/varredura-vencimento', methods=['POST'])
+def varredura_vencimento():
+    """Marca as contas vencidas e recalcula as faixas de atraso agora"""
+    try:
+        resumo = executar_varredura_vencimento()
+        if not resumo['executada']:
+            return jsonify({'erro': 'Varredura de vencimentos já em andamento'}), 409
+        
+        return jsonify({
+            'sucesso': True,
+            **resumo,
+            'mensagem': f"{resumo['contas_vencidas']} contas marcadas como vencidas"
+        })
+        
+    except Exception as e:
+        return jsonify({'erro': f'Erro na varredura de vencimentos: {str(e)}'}), 500
+
+@conta_receber_bp.route('/faixas-vencimento', methods=['GET'])
+def listar_faixas_vencimento():
+    """Quantidade e valor das contas vencidas por faixa de atraso (opcionalmente de uma empresa)"""
+    try:
+        return jsonify(obter_faixas_vencimento(request.args.get('empresa')))
+        
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao obter faixas de vencimento: {str(e)}'}), 500
+
+@conta_receber_bp.cli.command('varrer-vencimentos')
+@click.option('--data', help='Data de referência (YYYY-MM-DD, padrão: hoje)')
+def comando_varrer_vencimentos(data):
+    """Marca as contas vencidas e recalcula as faixas de atraso"""
+    hoje = datetime.strptime(data, '%Y-%m-%d').date() if data else None
+    resumo = executar_varredura_vencimento(hoje)
+    if not resumo['executada']:
+        raise click.ClickException('Varredura de vencimentos já em andamento')
+    
+    click.echo(f"{resumo['data_referencia']}: {resumo['contas_vencidas']} contas vencidas, "
+               f"{resumo['contas_reabertas']} voltaram para pendente")
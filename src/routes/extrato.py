@@ -1,148 +1,65 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 import os
-import csv
 import io
-from datetime import datetime
-from decimal import Decimal
-from src.models.conciliacao import db, Extrato, Transacao
-import re
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from src.models.conciliacao import db, Extrato, Transacao, ContaReceber, Conciliacao
+from src.models.arquivo import TransacaoArquivo
+from src.services.leitor_extrato import ler_csv_extrato, converter_transacao_json
+from src.services.vencimento import expressao_status_em_aberto
 
 extrato_bp = Blueprint('extrato', __name__)
 
 ALLOWED_EXTENSIONS = {'csv', 'txt', 'ofx'}
 
+# Linhas afetadas por comando na exclusão em lote de extratos
+TAMANHO_LOTE_EXCLUSAO = 5000
+
+# Transações aceitas por requisição na ingestão em tempo real
+MAXIMO_TRANSACOES_INGESTAO = 1000
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extrair_cpf_cnpj(texto):
-    """Extrai CPF ou CNPJ de um texto"""
-    if not texto:
-        return None
-    
-    # Remove caracteres especiais
-    texto_limpo = re.sub(r'[^\d]', '', texto)
-    
-    # Verifica se é CPF (11 dígitos)
-    if len(texto_limpo) == 11:
-        return f"{texto_limpo[:3]}.{texto_limpo[3:6]}.{texto_limpo[6:9]}-{texto_limpo[9:]}"
-    
-    # Verifica se é CNPJ (14 dígitos)
-    elif len(texto_limpo) == 14:
-        return f"{texto_limpo[:2]}.{texto_limpo[2:5]}.{texto_limpo[5:8]}/{texto_limpo[8:12]}-{texto_limpo[12:]}"
-    
-    return None
-
-def extrair_nome_pagador(descricao):
-    """Extrai o nome do pagador da descrição da transação"""
-    if not descricao:
-        return None
-    
-    # Padrões comuns para extrair nomes
-    padroes = [
-        r'TED\s+(.+?)(?:\s+CPF|$)',
-        r'DOC\s+(.+?)(?:\s+CPF|$)',
-        r'PIX\s+(.+?)(?:\s+CPF|$)',
-        r'DEPOSITO\s+(.+?)(?:\s+CPF|$)',
-        r'TRANSFERENCIA\s+(.+?)(?:\s+CPF|$)',
-    ]
-    
-    for padrao in padroes:
-        match = re.search(padrao, descricao.upper())
-        if match:
-            nome = match.group(1).strip()
-            # Remove números e caracteres especiais do final
-            nome = re.sub(r'[\d\-\.\s]+$', '', nome).strip()
-            if len(nome) > 3:  # Nome deve ter pelo menos 3 caracteres
-                return nome
-    
-    return None
-
-def processar_csv_extrato(arquivo_conteudo, nome_arquivo):
-    """Processa um arquivo CSV de extrato bancário"""
+def ler_escopo_extrato():
+    """Empresa, banco e conta informados no formulário de upload"""
+    return {
+        campo: request.form.get(campo) or None
+        for campo in ('empresa', 'banco', 'conta')
+    }
+
+def gravar_extrato(nome_arquivo, transacoes, empresa=None, banco=None, conta=None):
+    """Grava um extrato e suas transações já lidas, com inserção em lote"""
     try:
-        # Detecta o encoding
-        try:
-            conteudo = arquivo_conteudo.decode('utf-8')
-        except UnicodeDecodeError:
-            conteudo = arquivo_conteudo.decode('latin-1')
-        
         # Cria o extrato
         extrato = Extrato(
             nome_arquivo=nome_arquivo,
+            empresa=empresa,
+            banco=banco,
+            conta=conta,
             status='processando'
         )
         db.session.add(extrato)
         db.session.flush()  # Para obter o ID
         
-        # Processa o CSV
-        reader = csv.DictReader(io.StringIO(conteudo))
-        transacoes_processadas = 0
-        
-        for linha in reader:
-            try:
-                # Mapeia campos comuns (adaptar conforme formato do banco)
-                data_str = linha.get('Data', linha.get('data', ''))
-                valor_str = linha.get('Valor', linha.get('valor', '0'))
-                descricao = linha.get('Descrição', linha.get('descricao', linha.get('Histórico', '')))
-                documento = linha.get('Documento', linha.get('documento', ''))
-                
-                # Converte data
-                try:
-                    if '/' in data_str:
-                        data_transacao = datetime.strptime(data_str, '%d/%m/%Y').date()
-                    else:
-                        data_transacao = datetime.strptime(data_str, '%Y-%m-%d').date()
-                except:
-                    continue  # Pula linha com data inválida
-                
-                # Converte valor
-                try:
-                    valor_str = valor_str.replace(',', '.').replace('R$', '').strip()
-                    valor = Decimal(valor_str)
-                except:
-                    continue  # Pula linha com valor inválido
-                
-                # Determina tipo (crédito/débito)
-                tipo = 'credito' if valor > 0 else 'debito'
-                valor = abs(valor)
-                
-                # Extrai informações adicionais
-                nome_pagador = extrair_nome_pagador(descricao)
-                cpf_cnpj = extrair_cpf_cnpj(descricao)
-                
-                # Cria transação
-                transacao = Transacao(
-                    extrato_id=extrato.id,
-                    data_transacao=data_transacao,
-                    valor=valor,
-                    tipo=tipo,
-                    descricao=descricao,
-                    documento=documento,
-                    nome_pagador=nome_pagador,
-                    cpf_cnpj_pagador=cpf_cnpj
-                )
-                
-                db.session.add(transacao)
-                transacoes_processadas += 1
-                
-            except Exception as e:
-                print(f"Erro ao processar linha: {e}")
-                continue
+        if transacoes:
+            for transacao in transacoes:
+                transacao['extrato_id'] = extrato.id
+                transacao['empresa'] = empresa
+            db.session.execute(db.insert(Transacao), transacoes)
+            
+            # Define período do extrato
+            datas = [transacao['data_transacao'] for transacao in transacoes]
+            extrato.periodo_inicio = min(datas)
+            extrato.periodo_fim = max(datas)
         
         # Atualiza extrato
-        extrato.total_transacoes = transacoes_processadas
+        extrato.total_transacoes = len(transacoes)
         extrato.status = 'concluido'
         
-        # Define período do extrato
-        if transacoes_processadas > 0:
-            primeira_transacao = db.session.query(Transacao).filter_by(extrato_id=extrato.id).order_by(Transacao.data_transacao).first()
-            ultima_transacao = db.session.query(Transacao).filter_by(extrato_id=extrato.id).order_by(Transacao.data_transacao.desc()).first()
-            
-            if primeira_transacao and ultima_transacao:
-                extrato.periodo_inicio = primeira_transacao.data_transacao
-                extrato.periodo_fim = ultima_transacao.data_transacao
-        
         db.session.commit()
         return extrato
         
@@ -150,6 +67,85 @@ def processar_csv_extrato(arquivo_conteudo, nome_arquivo):
         db.session.rollback()
         raise e
 
+def ler_membros_zip(pacote, nome_pacote, extratos, rejeitados):
+    """Descompacta os CSVs de um ZIP respeitando os limites de quantidade e tamanho
+    
+    O tamanho de cada membro é conferido pelo cabeçalho e também durante a
+    leitura (que para no limite), já que o cabeçalho pode ter sido forjado.
+    Os membros só entram em `extratos` se o ZIP inteiro couber no limite;
+    caso contrário nenhum extrato do pacote é importado.
+    """
+    maximo_arquivos = current_app.config['IMPORTACAO_ZIP_MAXIMO_ARQUIVOS']
+    maximo_arquivo = current_app.config['IMPORTACAO_ARQUIVO_TAMANHO_MAXIMO']
+    restante = current_app.config['IMPORTACAO_ZIP_TAMANHO_MAXIMO']
+    
+    membros = [membro for membro in pacote.infolist() if not membro.is_dir()]
+    if len(membros) > maximo_arquivos:
+        rejeitados.append({'arquivo': nome_pacote, 'erro': f'ZIP com mais de {maximo_arquivos} arquivos'})
+        return
+    
+    lidos = []
+    for membro in membros:
+        nome_membro = secure_filename(os.path.basename(membro.filename))
+        if not nome_membro:
+            continue
+        if not nome_membro.lower().endswith('.csv'):
+            rejeitados.append({'arquivo': nome_membro, 'erro': 'Formato de arquivo não suportado ainda'})
+            continue
+        
+        limite = min(maximo_arquivo, restante)
+        if membro.file_size > limite:
+            conteudo = None
+        else:
+            with pacote.open(membro) as arquivo_membro:
+                conteudo = arquivo_membro.read(limite + 1)
+        
+        if conteudo is None or len(conteudo) > limite:
+            if limite < maximo_arquivo:
+                rejeitados.append({'arquivo': nome_pacote, 'erro': 'Conteúdo descompactado do ZIP excede o limite'})
+                return
+            rejeitados.append({'arquivo': nome_membro, 'erro': 'Arquivo excede o tamanho máximo'})
+            continue
+        
+        restante -= len(conteudo)
+        lidos.append((nome_membro, conteudo))
+    
+    extratos.extend(lidos)
+
+def expandir_arquivos_lote(arquivos):
+    """Lista (nome, conteúdo) dos extratos enviados, abrindo arquivos ZIP"""
+    extratos = []
+    rejeitados = []
+    
+    for arquivo in arquivos:
+        if not arquivo or arquivo.filename == '':
+            continue
+        
+        filename = secure_filename(arquivo.filename)
+        
+        if filename.lower().endswith('.zip'):
+            try:
+                with zipfile.ZipFile(io.BytesIO(arquivo.read())) as pacote:
+                    ler_membros_zip(pacote, filename, extratos, rejeitados)
+            except zipfile.BadZipFile:
+                rejeitados.append({'arquivo': filename, 'erro': 'Arquivo ZIP inválido'})
+        elif filename.lower().endswith('.csv'):
+            extratos.append((filename, arquivo.read()))
+        elif allowed_file(filename):
+            rejeitados.append({'arquivo': filename, 'erro': 'Formato de arquivo não suportado ainda'})
+        else:
+            rejeitados.append({'arquivo': filename, 'erro': 'Tipo de arquivo não permitido'})
+    
+    return extratos, rejeitados
+
+def criar_executor_leitura(quantidade_arquivos):
+    """Cria o pool que lê os arquivos enquanto a requisição grava no banco"""
+    workers = min(current_app.config.get('IMPORTACAO_WORKERS') or os.cpu_count() or 1, quantidade_arquivos)
+    
+    if current_app.config.get('IMPORTACAO_EXECUTOR') == 'process':
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
 @extrato_bp.route('/upload', methods=['POST'])
 def upload_extrato():
     """Endpoint para upload de extrato bancário"""
@@ -169,26 +165,155 @@ def upload_extrato():
             
             # Processa baseado na extensão
             if filename.lower().endswith('.csv'):
-                extrato = processar_csv_extrato(arquivo_conteudo, filename)
+                try:
+                    leitura = ler_csv_extrato(arquivo_conteudo)
+                except ValueError as e:
+                    return jsonify({'erro': f'Formato de extrato não reconhecido: {str(e)}'}), 400
+                extrato = gravar_extrato(filename, leitura['transacoes'], **ler_escopo_extrato())
             else:
                 return jsonify({'erro': 'Formato de arquivo não suportado ainda'}), 400
             
             return jsonify({
                 'sucesso': True,
                 'extrato': extrato.to_dict(),
+                'perfil': leitura['perfil'],
+                'linhas_ignoradas': leitura['linhas_ignoradas'],
+                'motivos_ignoradas': leitura['motivos_ignoradas'],
                 'mensagem': f'Extrato processado com sucesso. {extrato.total_transacoes} transações importadas.'
             })
         
         return jsonify({'erro': 'Tipo de arquivo não permitido'}), 400
         
+    except RequestEntityTooLarge:
+        return jsonify({'erro': 'Arquivo excede o tamanho máximo de upload'}), 413
     except Exception as e:
         return jsonify({'erro': f'Erro ao processar arquivo: {str(e)}'}), 500
 
+@extrato_bp.route('/upload-lote', methods=['POST'])
+def upload_extratos_lote():
+    """Upload de vários extratos de uma vez (arquivos avulsos ou ZIP)
+    
+    Os arquivos são lidos em paralelo; cada extrato é gravado assim que sua
+    leitura termina, enquanto os demais continuam sendo lidos.
+    """
+    try:
+        arquivos = request.files.getlist('arquivos') + request.files.getlist('arquivo')
+        if not arquivos:
+            return jsonify({'erro': 'Nenhum arquivo enviado'}), 400
+        
+        extratos, resultados = expandir_arquivos_lote(arquivos)
+        if not extratos and not resultados:
+            return jsonify({'erro': 'Nenhum arquivo selecionado'}), 400
+        
+        for resultado in resultados:
+            resultado['sucesso'] = False
+        
+        # Todos os arquivos do lote pertencem ao mesmo escopo
+        escopo = ler_escopo_extrato()
+        
+        if extratos:
+            with criar_executor_leitura(len(extratos)) as executor:
+                leituras = {
+                    executor.submit(ler_csv_extrato, conteudo): nome
+                    for nome, conteudo in extratos
+                }
+                
+                for leitura in as_completed(leituras):
+                    nome = leituras[leitura]
+                    try:
+                        dados_leitura = leitura.result()
+                        extrato = gravar_extrato(nome, dados_leitura['transacoes'], **escopo)
+                        resultados.append({
+                            'arquivo': nome,
+                            'sucesso': True,
+                            'extrato': extrato.to_dict(),
+                            'perfil': dados_leitura['perfil'],
+                            'linhas_ignoradas': dados_leitura['linhas_ignoradas'],
+                            'motivos_ignoradas': dados_leitura['motivos_ignoradas']
+                        })
+                    except Exception as e:
+                        resultados.append({'arquivo': nome, 'sucesso': False, 'erro': str(e)})
+        
+        importados = [resultado for resultado in resultados if resultado['sucesso']]
+        total_transacoes = sum(resultado['extrato']['total_transacoes'] for resultado in importados)
+        linhas_ignoradas = sum(resultado['linhas_ignoradas'] for resultado in importados)
+        
+        return jsonify({
+            'sucesso': bool(importados),
+            'extratos_importados': len(importados),
+            'arquivos_com_erro': len(resultados) - len(importados),
+            'total_transacoes': total_transacoes,
+            'linhas_ignoradas': linhas_ignoradas,
+            'resultados': resultados,
+            'mensagem': f'{len(importados)} extratos processados. {total_transacoes} transações importadas.'
+        })
+        
+    except RequestEntityTooLarge:
+        return jsonify({'erro': 'Arquivos excedem o tamanho máximo de upload'}), 413
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao processar arquivos: {str(e)}'}), 500
+
+@extrato_bp.route('/ingestao', methods=['POST'])
+def ingerir_transacoes():
+    """Recebe transações em tempo real (um objeto JSON ou uma lista)
+    
+    As transações são validadas, enfileiradas e gravadas em lotes no extrato
+    diário da empresa/banco/conta; os créditos de cada lote são conciliados
+    logo após a gravação. Responde 202 sem esperar a gravação.
+    """
+    try:
+        dados = request.get_json(silent=True)
+        if dados is None:
+            return jsonify({'erro': 'Dados não fornecidos'}), 400
+        
+        itens = dados if isinstance(dados, list) else [dados]
+        if not itens:
+            return jsonify({'erro': 'Nenhuma transação enviada'}), 400
+        if len(itens) > MAXIMO_TRANSACOES_INGESTAO:
+            return jsonify({'erro': f'Máximo de {MAXIMO_TRANSACOES_INGESTAO} transações por requisição'}), 413
+        
+        transacoes = []
+        erros = []
+        for indice, item in enumerate(itens):
+            try:
+                transacoes.append(converter_transacao_json(item))
+            except ValueError as e:
+                erros.append({'indice': indice, 'erro': str(e)})
+        
+        # O lote é aceito inteiro ou recusado inteiro
+        if erros:
+            return jsonify({'erro': 'Transações inválidas', 'detalhes': erros}), 400
+        
+        pendentes = current_app.extensions['ingestao'].adicionar(transacoes)
+        
+        return jsonify({
+            'sucesso': True,
+            'recebidas': len(transacoes),
+            'aguardando_gravacao': pendentes,
+            'mensagem': f'{len(transacoes)} transações recebidas'
+        }), 202
+        
+    except RequestEntityTooLarge:
+        return jsonify({'erro': 'Requisição excede o tamanho máximo'}), 413
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao receber transações: {str(e)}'}), 500
+
+@extrato_bp.route('/ingestao/status', methods=['GET'])
+def status_ingestao():
+    """Situação da fila de ingestão deste processo"""
+    return jsonify(current_app.extensions['ingestao'].situacao())
+
 @extrato_bp.route('/listar', methods=['GET'])
 def listar_extratos():
-    """Lista todos os extratos importados"""
+    """Lista todos os extratos importados (opcionalmente de uma empresa)"""
     try:
-        extratos = Extrato.query.order_by(Extrato.data_upload.desc()).all()
+        query = Extrato.query
+        
+        empresa = request.args.get('empresa')
+        if empresa:
+            query = query.filter(Extrato.empresa == empresa)
+        
+        extratos = query.order_by(Extrato.data_upload.desc()).all()
         return jsonify({
             'extratos': [extrato.to_dict() for extrato in extratos]
         })
@@ -209,19 +334,173 @@ def listar_transacoes(extrato_id):
     except Exception as e:
         return jsonify({'erro': f'Erro ao listar transações: {str(e)}'}), 500
 
+def desfazer_conciliacoes(lote):
+    """Remove as conciliações (id, conta_receber_id) e reabre as contas (vencidas ou pendentes)"""
+    db.session.execute(
+        db.update(ContaReceber)
+        .where(ContaReceber.id.in_([linha.conta_receber_id for linha in lote]))
+        .values(status=expressao_status_em_aberto())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        db.delete(Conciliacao)
+        .where(Conciliacao.id.in_([linha.id for linha in lote]))
+        .execution_options(synchronize_session=False)
+    )
+
+def reverter_conciliacoes_extrato(extrato_id, tamanho_lote=TAMANHO_LOTE_EXCLUSAO):
+    """Desfaz em lotes as conciliações das transações de um extrato
+    
+    As contas a receber envolvidas voltam a ficar em aberto ('vencido' ou
+    'pendente', pela data de vencimento) antes de as conciliações serem
+    removidas. Cada lote é confirmado separadamente.
+    """
+    total = 0
+    
+    while True:
+        lote = db.session.execute(
+            db.select(Conciliacao.id, Conciliacao.conta_receber_id)
+            .join(Transacao, Conciliacao.transacao_id == Transacao.id)
+            .where(Transacao.extrato_id == extrato_id)
+            .limit(tamanho_lote)
+        ).all()
+        
+        if not lote:
+            break
+        
+        desfazer_conciliacoes(lote)
+        db.session.commit()
+        total += len(lote)
+    
+    return total
+
+def excluir_transacoes_extrato(extrato_id, tamanho_lote=TAMANHO_LOTE_EXCLUSAO):
+    """Remove em lotes as transações de um extrato com DELETE ... WHERE id IN (lote)
+    
+    As transações do lote são travadas (PostgreSQL) antes de remover, na
+    mesma transação, alguma conciliação feita depois da reversão por uma
+    execução que já as tinha reservado. Devolve as transações removidas e
+    essas conciliações desfeitas.
+    """
+    total = 0
+    conciliacoes_desfeitas = 0
+    
+    while True:
+        ids = db.session.scalars(
+            db.select(Transacao.id)
+            .where(Transacao.extrato_id == extrato_id)
+            .order_by(Transacao.id)
+            .limit(tamanho_lote)
+            .with_for_update()
+        ).all()
+        
+        if not ids:
+            break
+        
+        tardias = db.session.execute(
+            db.select(Conciliacao.id, Conciliacao.conta_receber_id).where(Conciliacao.transacao_id.in_(ids))
+        ).all()
+        if tardias:
+            desfazer_conciliacoes(tardias)
+            conciliacoes_desfeitas += len(tardias)
+        
+        total += db.session.execute(
+            db.delete(Transacao)
+            .where(Transacao.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+    
+    return total, conciliacoes_desfeitas
+
+def excluir_extrato_em_lote(extrato_id, tamanho_lote=TAMANHO_LOTE_EXCLUSAO):
+    """Exclui um extrato com comandos em conjunto, sem carregar as transações na sessão
+    
+    O extrato fica com status 'excluindo' durante a exclusão, e a
+    conciliação automática não reserva mais as suas transações.
+    """
+    db.session.execute(
+        db.update(Extrato)
+        .where(Extrato.id == extrato_id)
+        .values(status='excluindo')
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    
+    conciliacoes_desfeitas = reverter_conciliacoes_extrato(extrato_id, tamanho_lote)
+    transacoes_removidas, conciliacoes_tardias = excluir_transacoes_extrato(extrato_id, tamanho_lote)
+    conciliacoes_desfeitas += conciliacoes_tardias
+    
+    db.session.execute(
+        db.delete(Extrato)
+        .where(Extrato.id == extrato_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    
+    return conciliacoes_desfeitas, transacoes_removidas
+
+def marcar_extrato_com_erro(extrato_id):
+    """Tira o extrato de 'excluindo' depois de uma exclusão que falhou"""
+    db.session.rollback()
+    db.session.execute(
+        db.update(Extrato)
+        .where(Extrato.id == extrato_id)
+        .values(status='erro')
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+def excluir_extrato_em_segundo_plano(app, extrato_id):
+    """Executa a exclusão em lote fora da requisição"""
+    with app.app_context():
+        try:
+            excluir_extrato_em_lote(extrato_id)
+        except Exception as e:
+            marcar_extrato_com_erro(extrato_id)
+            current_app.logger.error(f'Erro ao deletar extrato {extrato_id}: {e}')
+
 @extrato_bp.route('/<int:extrato_id>', methods=['DELETE'])
 def deletar_extrato(extrato_id):
-    """Deleta um extrato e suas transações"""
+    """Deleta um extrato e suas transações, desfazendo as conciliações afetadas
+    
+    Com ?assincrono=true a exclusão roda em segundo plano e o extrato
+    fica com status 'excluindo' até terminar. Se a exclusão falhar, nos
+    dois modos, o extrato fica com status 'erro'.
+    """
     try:
         extrato = Extrato.query.get_or_404(extrato_id)
-        db.session.delete(extrato)
-        db.session.commit()
+        
+        if db.session.query(TransacaoArquivo.id).filter_by(extrato_id=extrato_id).first():
+            return jsonify({'erro': 'Extrato possui transações em períodos arquivados e não pode ser deletado'}), 409
+        
+        if request.args.get('assincrono', '').lower() in ('1', 'true', 'sim'):
+            extrato.status = 'excluindo'
+            db.session.commit()
+            
+            threading.Thread(
+                target=excluir_extrato_em_segundo_plano,
+                args=(current_app._get_current_object(), extrato_id),
+                daemon=True
+            ).start()
+            
+            return jsonify({
+                'sucesso': True,
+                'mensagem': 'Exclusão do extrato iniciada em segundo plano'
+            }), 202
+        
+        try:
+            conciliacoes_desfeitas, transacoes_removidas = excluir_extrato_em_lote(extrato_id)
+        except Exception:
+            marcar_extrato_com_erro(extrato_id)
+            raise
         
         return jsonify({
             'sucesso': True,
+            'conciliacoes_desfeitas': conciliacoes_desfeitas,
+            'transacoes_removidas': transacoes_removidas,
             'mensagem': 'Extrato deletado com sucesso'
         })
     except Exception as e:
         db.session.rollback()
         return jsonify({'erro': f'Erro ao deletar extrato: {str(e)}'}), 500
-
@@ -0,0 +1,243 @@
+import atexit
+import threading
+import time
+import zlib
+from datetime import date
+from src.models.conciliacao import db, Extrato, Transacao
+
+# Ingestão em tempo real: as transações recebidas pela API são acumuladas
+# em memória e gravadas em lotes (por tamanho ou tempo) por uma thread do
+# processo, no extrato diário da empresa/conta. Cada lote gravado é
+# conciliado em seguida, apenas com os créditos recém-chegados.
+
+# Tentativas de gravação de um lote antes de gravá-lo transação a transação
+TENTATIVAS_GRAVACAO = 3
+
+def nome_extrato_diario(dia):
+    """Nome do extrato que acumula as transações recebidas no dia"""
+    return f'ingestao_{dia.isoformat()}'
+
+def chave_trava_extrato_diario(dia, empresa, banco, conta):
+    """Chave do advisory lock do extrato diário de um escopo (igual em todos os processos)"""
+    escopo = '|'.join([nome_extrato_diario(dia)] + ['' if valor is None else str(valor) for valor in (empresa, banco, conta)])
+    return zlib.crc32(escopo.encode('utf-8'))
+
+def travar_extrato_diario(dia, empresa, banco, conta):
+    """Serializa a criação do extrato diário do escopo até o fim da transação
+    
+    Cada worker do gunicorn tem o seu agendador de ingestão; sem a trava,
+    dois lotes do mesmo escopo não encontrariam o extrato e criariam dois.
+    Uma chave única não resolve, porque empresa, banco e conta costumam ser
+    nulos. O advisory lock é liberado no commit ou rollback; no SQLite as
+    escritas já são serializadas pelo próprio banco.
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    db.session.execute(db.select(db.func.pg_advisory_xact_lock(chave_trava_extrato_diario(dia, empresa, banco, conta))))
+
+def obter_extrato_diario(dia, empresa, banco, conta):
+    """Busca (ou cria) o extrato diário do escopo empresa/banco/conta"""
+    travar_extrato_diario(dia, empresa, banco, conta)
+    
+    condicoes = [Extrato.nome_arquivo == nome_extrato_diario(dia)]
+    for coluna, valor in ((Extrato.empresa, empresa), (Extrato.banco, banco), (Extrato.conta, conta)):
+        condicoes.append(coluna.is_(None) if valor is None else coluna == valor)
+    
+    extrato = Extrato.query.filter(*condicoes).first()
+    if extrato is None:
+        extrato = Extrato(
+            nome_arquivo=nome_extrato_diario(dia),
+            empresa=empresa,
+            banco=banco,
+            conta=conta,
+            total_transacoes=0,
+            status='concluido'
+        )
+        db.session.add(extrato)
+        db.session.flush()
+    
+    return extrato
+
+def gravar_lote_ingestao(transacoes, dia=None):
+    """Grava um lote de transações nos extratos diários e devolve os ids dos créditos"""
+    dia = dia or date.today()
+    
+    # Separa o lote pelo escopo do extrato
+    grupos = {}
+    for transacao in transacoes:
+        transacao = dict(transacao)
+        escopo = (transacao['empresa'], transacao.pop('banco'), transacao.pop('conta'))
+        grupos.setdefault(escopo, []).append(transacao)
+    
+    creditos = []
+    
+    # Travas sempre na mesma ordem, para dois lotes não se bloquearem mutuamente
+    ordenados = sorted(grupos.items(), key=lambda item: chave_trava_extrato_diario(dia, *item[0]))
+    
+    try:
+        for (empresa, banco, conta), grupo in ordenados:
+            extrato = obter_extrato_diario(dia, empresa, banco, conta)
+            
+            for transacao in grupo:
+                transacao['extrato_id'] = extrato.id
+            ids = db.session.scalars(db.insert(Transacao).returning(Transacao.id, sort_by_parameter_order=True), grupo).all()
+            
+            # Período e total acumulados do extrato diário
+            datas = [transacao['data_transacao'] for transacao in grupo]
+            extrato.periodo_inicio = min([extrato.periodo_inicio or min(datas), *datas])
+            extrato.periodo_fim = max([extrato.periodo_fim or max(datas), *datas])
+            extrato.total_transacoes = (extrato.total_transacoes or 0) + len(grupo)
+            
+            creditos.extend(id_transacao for id_transacao, transacao in zip(ids, grupo) if transacao['tipo'] == 'credito')
+        
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return creditos
+
+class AgrupadorIngestao:
+    """Acumula transações recebidas e grava em lotes em uma thread de fundo
+    
+    Um lote é gravado quando atinge `tamanho_lote` transações ou quando a
+    mais antiga espera `intervalo` segundos. A thread só é iniciada na
+    primeira transação recebida.
+    """
+    
+    def __init__(self, app, tamanho_lote=100, intervalo=0.5, confianca_minima=0.8):
+        self.app = app
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.confianca_minima = confianca_minima
+        
+        self._pendentes = []
+        self._chegada_mais_antiga = None
+        self._condicao = threading.Condition()
+        self._thread = None
+        self._parando = False
+        
+        self.estatisticas = {
+            'lotes_gravados': 0,
+            'transacoes_gravadas': 0,
+            'transacoes_descartadas': 0,
+            'conciliacoes_realizadas': 0,
+            'ultimo_erro': None
+        }
+    
+    def adicionar(self, transacoes):
+        """Enfileira transações já convertidas; devolve quantas aguardam gravação"""
+        with self._condicao:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name='ingestao', daemon=True)
+                self._thread.start()
+                atexit.register(self.parar)
+            
+            if not self._pendentes:
+                self._chegada_mais_antiga = time.monotonic()
+            self._pendentes.extend(transacoes)
+            
+            if len(self._pendentes) >= self.tamanho_lote:
+                self._condicao.notify()
+            
+            return len(self._pendentes)
+    
+    def situacao(self):
+        """Contadores da ingestão e tamanho da fila"""
+        with self._condicao:
+            return dict(self.estatisticas, pendentes=len(self._pendentes))
+    
+    def parar(self, timeout=10):
+        """Grava o que estiver pendente e encerra a thread"""
+        with self._condicao:
+            self._parando = True
+            self._condicao.notify()
+        
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def _proximo_lote(self):
+        """Espera até haver um lote pronto; None quando a thread deve encerrar"""
+        with self._condicao:
+            while not self._pendentes and not self._parando:
+                self._condicao.wait()
+            
+            if not self._pendentes:
+                return None
+            
+            # Espera completar o lote ou vencer o prazo da transação mais antiga
+            prazo = self._chegada_mais_antiga + self.intervalo
+            while len(self._pendentes) < self.tamanho_lote and not self._parando:
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    break
+                self._condicao.wait(restante)
+            
+            lote = self._pendentes[:self.tamanho_lote]
+            del self._pendentes[:self.tamanho_lote]
+            self._chegada_mais_antiga = time.monotonic() if self._pendentes else None
+            return lote
+    
+    def _executar(self):
+        while True:
+            lote = self._proximo_lote()
+            if lote is None:
+                return
+            
+            with self.app.app_context():
+                self._gravar(lote)
+    
+    def _gravar_individualmente(self, lote):
+        """Grava as transações uma a uma, descartando só as que falham"""
+        creditos = []
+        gravadas = 0
+        
+        for transacao in lote:
+            try:
+                creditos.extend(gravar_lote_ingestao([transacao]))
+                gravadas += 1
+            except Exception as e:
+                self.estatisticas['ultimo_erro'] = str(e)
+                self.estatisticas['transacoes_descartadas'] += 1
+                self.app.logger.error(f'Transação de ingestão descartada: {e}')
+        
+        return creditos, gravadas
+    
+    def _gravar(self, lote):
+        """Grava o lote (com novas tentativas) e concilia os créditos gravados
+        
+        Se todas as tentativas falham, o lote é gravado transação a
+        transação, para que uma transação com erro não descarte as demais.
+        """
+        # Import tardio: as rotas de conciliação dependem dos modelos e serviços
+        from src.routes.conciliacao import executar_conciliacao_automatica
+        
+        for tentativa in range(1, TENTATIVAS_GRAVACAO + 1):
+            try:
+                creditos = gravar_lote_ingestao(lote)
+                gravadas = len(lote)
+                break
+            except Exception as e:
+                self.estatisticas['ultimo_erro'] = str(e)
+                self.app.logger.error(f'Erro ao gravar lote de ingestão (tentativa {tentativa}): {e}')
+                if tentativa == TENTATIVAS_GRAVACAO:
+                    creditos, gravadas = self._gravar_individualmente(lote)
+                    break
+                time.sleep(self.intervalo)
+        
+        if not gravadas:
+            return
+        
+        self.estatisticas['lotes_gravados'] += 1
+        self.estatisticas['transacoes_gravadas'] += gravadas
+        
+        if not creditos:
+            return
+        
+        # Créditos não conciliados aqui ficam para a próxima conciliação automática
+        try:
+            resultados, _ = executar_conciliacao_automatica(self.confianca_minima, transacoes_ids=creditos)
+            self.estatisticas['conciliacoes_realizadas'] += len(resultados)
+        except Exception as e:
+            self.estatisticas['ultimo_erro'] = str(e)
+            self.app.logger.error(f'Erro na conciliação do lote de ingestão: {e}')
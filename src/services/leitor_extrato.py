@@ -0,0 +1,391 @@
+import csv
+import io
+import re
+import unicodedata
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+# Leitura dos arquivos de extrato, sem acesso ao banco de dados.
+# As funções daqui podem rodar em threads ou processos separados.
+
+def extrair_cpf_cnpj(texto):
+    """Extrai CPF ou CNPJ de um texto"""
+    if not texto:
+        return None
+    
+    # Remove caracteres especiais
+    texto_limpo = re.sub(r'[^\d]', '', texto)
+    
+    # Verifica se é CPF (11 dígitos)
+    if len(texto_limpo) == 11:
+        return f"{texto_limpo[:3]}.{texto_limpo[3:6]}.{texto_limpo[6:9]}-{texto_limpo[9:]}"
+    
+    # Verifica se é CNPJ (14 dígitos)
+    elif len(texto_limpo) == 14:
+        return f"{texto_limpo[:2]}.{texto_limpo[2:5]}.{texto_limpo[5:8]}/{texto_limpo[8:12]}-{texto_limpo[12:]}"
+    
+    return None
+
+def extrair_nome_pagador(descricao):
+    """Extrai o nome do pagador da descrição da transação"""
+    if not descricao:
+        return None
+    
+    # Padrões comuns para extrair nomes
+    padroes = [
+        r'TED\s+(.+?)(?:\s+CPF|$)',
+        r'DOC\s+(.+?)(?:\s+CPF|$)',
+        r'PIX\s+(.+?)(?:\s+CPF|$)',
+        r'DEPOSITO\s+(.+?)(?:\s+CPF|$)',
+        r'TRANSFERENCIA\s+(.+?)(?:\s+CPF|$)',
+    ]
+    
+    for padrao in padroes:
+        match = re.search(padrao, descricao.upper())
+        if match:
+            nome = match.group(1).strip()
+            # Remove números e caracteres especiais do final
+            nome = re.sub(r'[\d\-\.\s]+$', '', nome).strip()
+            if len(nome) > 3:  # Nome deve ter pelo menos 3 caracteres
+                return nome
+    
+    return None
+
+def decodificar_conteudo(arquivo_conteudo):
+    """Decodifica o arquivo em UTF-8 (com ou sem BOM), com latin-1 como alternativa"""
+    try:
+        return arquivo_conteudo.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return arquivo_conteudo.decode('latin-1')
+
+# Perfil de leitura de um extrato: posições das colunas e formatos.
+# col_valor é usada quando o banco traz um único valor com sinal;
+# col_credito/col_debito quando traz colunas separadas.
+PerfilBanco = namedtuple('PerfilBanco', [
+    'delimitador', 'col_data', 'col_valor', 'col_credito', 'col_debito',
+    'col_descricao', 'col_documento', 'formato_data', 'separador_decimal'
+])
+
+DELIMITADORES = (';', ',', '\t', '|')
+
+# Nomes de cabeçalho aceitos para cada coluna (sem acento, minúsculos, só letras e números)
+ALIASES_COLUNAS = {
+    'col_data': ('data', 'datalancamento', 'datamovimento', 'datamovimentacao', 'datatransacao', 'dtlancamento', 'dtmovimento'),
+    'col_valor': ('valor', 'valorlancamento', 'montante', 'quantia'),
+    'col_credito': ('credito', 'creditos', 'valorcredito', 'entrada', 'entradas'),
+    'col_debito': ('debito', 'debitos', 'valordebito', 'saida', 'saidas'),
+    'col_descricao': ('descricao', 'historico', 'lancamento', 'detalhe', 'detalhes', 'memo'),
+    'col_documento': ('documento', 'doc', 'docto', 'numerodocumento', 'ndocumento', 'nodocumento', 'nrdocumento', 'numdocumento'),
+}
+
+# Linhas em branco (ou só com espaços) antes do cabeçalho
+LINHAS_EM_BRANCO = re.compile(r'(?:[ \t]*(?:\r\n|\r|\n))*')
+QUEBRA_LINHA = re.compile(r'\r\n|\r|\n')
+
+# Linhas de dados usadas para detectar os formatos de data e número
+TAMANHO_AMOSTRA = 20
+
+# Tabelas de tradução para os valores: removem símbolos/milhar e trocam a vírgula decimal
+TRADUCAO_VALOR = {
+    ',': str.maketrans({',': '.', '.': None, ' ': None, '\xa0': None, 'R': None, '$': None, '+': None}),
+    '.': str.maketrans({',': None, ' ': None, '\xa0': None, 'R': None, '$': None, '+': None}),
+}
+
+def normalizar_cabecalho(nome):
+    """Remove acentos, espaços, pontuação e o símbolo de moeda de um nome de coluna"""
+    sem_acento = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]', '', sem_acento.lower().replace('r$', ''))
+
+def detectar_delimitador(linha_cabecalho):
+    """Escolhe o delimitador mais frequente no cabeçalho"""
+    return max(DELIMITADORES, key=linha_cabecalho.count)
+
+@lru_cache(maxsize=64)
+def mapear_colunas(cabecalho):
+    """Associa cada coluna conhecida à sua posição no cabeçalho (resultado em cache)"""
+    normalizados = [normalizar_cabecalho(nome) for nome in cabecalho]
+    posicoes = {}
+    
+    for campo, aliases in ALIASES_COLUNAS.items():
+        posicoes[campo] = next((indice for indice, nome in enumerate(normalizados) if nome in aliases), None)
+    
+    return posicoes
+
+def detectar_formato_data(amostras):
+    """Detecta se as datas vêm como dia/mês/ano ou ano-mês-dia"""
+    for texto in amostras:
+        texto = texto.strip()
+        if len(texto) >= 8:
+            return 'ymd' if texto[4:5] in ('-', '/') and texto[:4].isdigit() else 'dmy'
+    return 'dmy'
+
+def detectar_separador_decimal(amostras, delimitador):
+    """Detecta se os valores usam vírgula (1.234,56) ou ponto (1,234.56) como decimal"""
+    for texto in amostras:
+        posicao_virgula = texto.rfind(',')
+        posicao_ponto = texto.rfind('.')
+        if posicao_virgula >= 0 and posicao_ponto >= 0:
+            return ',' if posicao_virgula > posicao_ponto else '.'
+        if posicao_virgula >= 0:
+            return ','
+    
+    # Sem vírgula nas amostras: arquivos com ';' seguem o padrão brasileiro
+    if delimitador == ';' and any(re.search(r'\.\d{3}$', texto.strip()) for texto in amostras):
+        return ','
+    return '.'
+
+def detectar_perfil(cabecalho, delimitador, amostra):
+    """Monta o perfil do banco a partir do cabeçalho e das primeiras linhas"""
+    posicoes = mapear_colunas(tuple(cabecalho))
+    
+    if posicoes['col_data'] is None:
+        raise ValueError('Coluna de data não encontrada no cabeçalho')
+    if posicoes['col_valor'] is None and posicoes['col_credito'] is None and posicoes['col_debito'] is None:
+        raise ValueError('Coluna de valor (ou crédito/débito) não encontrada no cabeçalho')
+    
+    def valores_coluna(indice):
+        if indice is None:
+            return []
+        return [linha[indice] for linha in amostra if indice < len(linha) and linha[indice].strip()]
+    
+    amostras_valor = []
+    for campo in ('col_valor', 'col_credito', 'col_debito'):
+        amostras_valor.extend(valores_coluna(posicoes[campo]))
+    
+    return PerfilBanco(
+        delimitador=delimitador,
+        formato_data=detectar_formato_data(valores_coluna(posicoes['col_data'])),
+        separador_decimal=detectar_separador_decimal(amostras_valor, delimitador),
+        **posicoes
+    )
+
+def descrever_perfil(perfil):
+    """Resumo legível do perfil detectado"""
+    colunas = 'credito/debito' if perfil.col_valor is None else 'valor'
+    return f"delimitador '{perfil.delimitador}', data {perfil.formato_data}, decimal '{perfil.separador_decimal}', {colunas}"
+
+def converter_data(texto, formato):
+    """Converte datas dd/mm/aaaa, dd/mm/aa ou aaaa-mm-dd sem usar strptime
+    
+    Dia e mês podem vir sem zero à esquerda (1/2/2025, 2025-1-5); um
+    horário depois da data é ignorado.
+    """
+    texto = texto.strip()
+    data = texto.split(maxsplit=1)[0] if texto else ''
+    separador = next((caractere for caractere in data if caractere in '/-.'), None)
+    partes = data.split(separador) if separador else []
+    
+    if len(partes) != 3 or not all(parte.isdigit() for parte in partes):
+        raise ValueError(f'Data inválida: {texto}')
+    
+    if formato == 'ymd':
+        ano, mes, dia = partes
+    else:
+        dia, mes, ano = partes
+    
+    if len(ano) == 2:
+        return date(2000 + int(ano), int(mes), int(dia))
+    if len(ano) == 4:
+        return date(int(ano), int(mes), int(dia))
+    
+    raise ValueError(f'Data inválida: {texto}')
+
+def converter_valor(texto, separador_decimal):
+    """Converte valores como 'R$ 1.234,56', '-10,00', '(10,00)' ou '10,00 D'
+    
+    Retorna None para célula vazia e levanta InvalidOperation para texto que
+    não é número (inclusive NaN e Infinity).
+    """
+    texto = texto.strip()
+    if not texto:
+        return None
+    
+    negativo = False
+    
+    ultimo = texto[-1]
+    if ultimo in 'DdCc':
+        negativo = ultimo in 'Dd'
+        texto = texto[:-1].rstrip()
+    
+    if texto[0] == '(' and texto[-1] == ')':
+        negativo = True
+        texto = texto[1:-1]
+    
+    if texto[-1] == '-':
+        negativo = True
+        texto = texto[:-1]
+    
+    valor = Decimal(texto.translate(TRADUCAO_VALOR[separador_decimal]))
+    if not valor.is_finite():
+        raise InvalidOperation(f'Valor inválido: {texto}')
+    return -valor if negativo else valor
+
+def ler_csv_extrato(arquivo_conteudo):
+    """Lê um CSV de extrato e devolve as transações como dicionários
+    
+    O perfil do banco (delimitador, colunas e formatos) é detectado uma vez
+    pelo cabeçalho e pelas primeiras linhas; depois cada linha é decodificada
+    por posição. Linhas descartadas são contadas por motivo. O csv lê o
+    texto inteiro, então campos entre aspas podem conter quebras de linha.
+    """
+    conteudo = decodificar_conteudo(arquivo_conteudo)
+    conteudo = conteudo[LINHAS_EM_BRANCO.match(conteudo).end():]
+    
+    if not conteudo.strip():
+        return {'transacoes': [], 'linhas_ignoradas': 0, 'motivos_ignoradas': {}, 'perfil': None}
+    
+    delimitador = detectar_delimitador(QUEBRA_LINHA.split(conteudo, maxsplit=1)[0])
+    reader = csv.reader(io.StringIO(conteudo), delimiter=delimitador)
+    cabecalho = next(reader)
+    linhas = list(reader)
+    
+    perfil = detectar_perfil(cabecalho, delimitador, linhas[:TAMANHO_AMOSTRA])
+    
+    col_data = perfil.col_data
+    col_valor = perfil.col_valor
+    col_credito = perfil.col_credito
+    col_debito = perfil.col_debito
+    col_descricao = perfil.col_descricao
+    col_documento = perfil.col_documento
+    formato_data = perfil.formato_data
+    separador_decimal = perfil.separador_decimal
+    tamanho_minimo = max(indice for indice in (col_data, col_valor, col_credito, col_debito) if indice is not None) + 1
+    
+    transacoes = []
+    motivos = {}
+    
+    for linha in linhas:
+        if not any(linha):
+            continue
+        
+        if len(linha) < tamanho_minimo:
+            motivos['linha_incompleta'] = motivos.get('linha_incompleta', 0) + 1
+            continue
+        
+        # Converte data
+        try:
+            data_transacao = converter_data(linha[col_data], formato_data)
+        except (ValueError, IndexError):
+            motivos['data_invalida'] = motivos.get('data_invalida', 0) + 1
+            continue
+        
+        # Converte valor (único com sinal, ou crédito menos débito)
+        try:
+            if col_valor is not None:
+                valor = converter_valor(linha[col_valor], separador_decimal)
+            else:
+                credito = converter_valor(linha[col_credito], separador_decimal) if col_credito is not None else None
+                debito = converter_valor(linha[col_debito], separador_decimal) if col_debito is not None else None
+                valor = None if credito is None and debito is None else abs(credito or 0) - abs(debito or 0)
+        except (InvalidOperation, IndexError):
+            valor = None
+        
+        if valor is None:
+            motivos['valor_invalido'] = motivos.get('valor_invalido', 0) + 1
+            continue
+        
+        descricao = linha[col_descricao] if col_descricao is not None and col_descricao < len(linha) else ''
+        documento = linha[col_documento] if col_documento is not None and col_documento < len(linha) else ''
+        
+        # Determina tipo (crédito/débito)
+        tipo = 'credito' if valor > 0 else 'debito'
+        
+        # Cria transação
+        transacoes.append({
+            'data_transacao': data_transacao,
+            'valor': abs(valor),
+            'tipo': tipo,
+            'descricao': descricao,
+            'documento': documento,
+            'nome_pagador': extrair_nome_pagador(descricao),
+            'cpf_cnpj_pagador': extrair_cpf_cnpj(descricao)
+        })
+    
+    return {
+        'transacoes': transacoes,
+        'linhas_ignoradas': sum(motivos.values()),
+        'motivos_ignoradas': motivos,
+        'perfil': descrever_perfil(perfil)
+    }
+
+# Tamanho máximo dos campos de texto (colunas de Transacao e Extrato)
+TAMANHOS_CAMPOS_TRANSACAO = {
+    'documento': 100,
+    'nome_pagador': 255,
+    'cpf_cnpj_pagador': 20,
+    'banco_origem': 100,
+    'empresa': 50,
+    'banco': 100,
+    'conta': 50
+}
+
+# Numeric(15, 2): até 13 dígitos antes da vírgula
+VALOR_MAXIMO_TRANSACAO = Decimal(10) ** 13
+
+def converter_transacao_json(dados):
+    """Converte uma transação recebida por JSON (ingestão em tempo real)
+    
+    Campos: valor (obrigatório; negativo indica débito quando tipo não é
+    informado), data_transacao (YYYY-MM-DD, padrão hoje), tipo, descricao,
+    documento, nome_pagador e cpf_cnpj_pagador (extraídos da descrição se
+    ausentes), banco_origem, e o escopo empresa/banco/conta.
+    Levanta ValueError com a descrição do problema, inclusive para valores
+    fora de Numeric(15, 2) e textos maiores que a coluna.
+    """
+    if not isinstance(dados, dict):
+        raise ValueError('Transação deve ser um objeto JSON')
+    
+    valor_bruto = dados.get('valor')
+    if valor_bruto is None or isinstance(valor_bruto, bool) or valor_bruto == '':
+        raise ValueError('valor é obrigatório')
+    try:
+        valor = Decimal(str(valor_bruto))
+    except InvalidOperation:
+        raise ValueError(f'Valor inválido: {valor_bruto}')
+    if not valor.is_finite() or valor == 0:
+        raise ValueError(f'Valor inválido: {valor_bruto}')
+    if abs(valor) >= VALOR_MAXIMO_TRANSACAO:
+        raise ValueError(f'Valor fora do limite: {valor_bruto}')
+    try:
+        valor_absoluto = abs(valor).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f'Valor inválido: {valor_bruto}')
+    
+    tipo = dados.get('tipo') or ('credito' if valor > 0 else 'debito')
+    if tipo not in ('credito', 'debito'):
+        raise ValueError(f'Tipo inválido: {tipo}')
+    
+    data_transacao = date.today()
+    if dados.get('data_transacao'):
+        try:
+            data_transacao = date.fromisoformat(str(dados['data_transacao']))
+        except ValueError:
+            raise ValueError(f"Data inválida: {dados['data_transacao']}. Use formato YYYY-MM-DD")
+    
+    for campo, tamanho in TAMANHOS_CAMPOS_TRANSACAO.items():
+        texto = dados.get(campo)
+        if texto is not None and len(str(texto)) > tamanho:
+            raise ValueError(f'{campo} excede {tamanho} caracteres')
+    
+    descricao = dados.get('descricao') or ''
+    
+    # O nome extraído de uma descrição longa é cortado no tamanho da coluna
+    nome_pagador = dados.get('nome_pagador') or extrair_nome_pagador(descricao)
+    if nome_pagador:
+        nome_pagador = nome_pagador[:TAMANHOS_CAMPOS_TRANSACAO['nome_pagador']]
+    
+    return {
+        'data_transacao': data_transacao,
+        'valor': valor_absoluto,
+        'tipo': tipo,
+        'descricao': descricao,
+        'documento': dados.get('documento') or '',
+        'nome_pagador': nome_pagador,
+        'cpf_cnpj_pagador': dados.get('cpf_cnpj_pagador') or extrair_cpf_cnpj(descricao),
+        'banco_origem': dados.get('banco_origem'),
+        'empresa': dados.get('empresa'),
+        'banco': dados.get('banco'),
+        'conta': dados.get('conta')
+    }
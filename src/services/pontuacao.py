@@ -0,0 +1,545 @@
+from src.models.conciliacao import db, ContaReceber, mesma_empresa, status_em_aberto
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import GenericFunction
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal, ROUND_FLOOR, ROUND_CEILING
+import heapq
+import re
+import sqlite3
+import threading
+
+# Pesos de cada fator na confiança final
+PESO_VALOR = 0.4
+PESO_IDENTIFICACAO = 0.3
+PESO_DATA = 0.2
+PESO_PEDIDO = 0.1
+
+# Colunas de Conciliacao que guardam cada fator, na ordem de calcular_fatores
+COLUNAS_FATORES = ('pontuacao_valor', 'pontuacao_identificacao', 'pontuacao_data', 'pontuacao_pedido')
+
+# Confiança mínima para uma conta aparecer como candidata
+CONFIANCA_MINIMA_CANDIDATO = 0.3
+
+TOLERANCIA_VALOR = 0.05
+TOLERANCIA_DIAS_VENCIMENTO = 7
+TOLERANCIA_DIAS_CRIACAO = 30
+
+# Candidatos lidos do banco por página, por sugestão pedida
+FOLGA_SUGESTOES_SQL = 4
+
+# Margem para diferenças de arredondamento entre o cálculo no banco e em Python
+EPSILON_PONTUACAO = 1e-9
+
+# Pares transação/conta pontuados recentemente, chaveados pelos ids e versões
+TAMANHO_CACHE_PONTUACAO = 50000
+
+# Pares conta/transação vistos pela seleção das melhores, quantos foram
+# descartados antes da pontuação completa e uso do cache de pares
+estatisticas_pontuacao = {'pares_avaliados': 0, 'pares_podados': 0, 'cache_acertos': 0, 'cache_faltas': 0}
+_trava_estatisticas = threading.Lock()
+
+_cache_pares = OrderedDict()
+_trava_cache = threading.Lock()
+
+def calcular_similaridade_texto(texto1, texto2):
+    """Calcula similaridade básica entre dois textos"""
+    if not texto1 or not texto2:
+        return 0.0
+    
+    texto1 = texto1.lower().strip()
+    texto2 = texto2.lower().strip()
+    
+    # Similaridade exata
+    if texto1 == texto2:
+        return 1.0
+    
+    # Verifica se um texto contém o outro
+    if texto1 in texto2 or texto2 in texto1:
+        return 0.8
+    
+    # Conta palavras em comum
+    palavras1 = set(re.findall(r'\w+', texto1))
+    palavras2 = set(re.findall(r'\w+', texto2))
+    
+    if not palavras1 or not palavras2:
+        return 0.0
+    
+    intersecao = len(palavras1.intersection(palavras2))
+    uniao = len(palavras1.union(palavras2))
+    
+    return intersecao / uniao if uniao > 0 else 0.0
+
+def calcular_similaridade_valor(valor1, valor2, tolerancia_percentual=TOLERANCIA_VALOR):
+    """Calcula similaridade entre valores com tolerância"""
+    if valor1 == valor2:
+        return 1.0
+    
+    diferenca = abs(valor1 - valor2)
+    maior_valor = max(valor1, valor2)
+    
+    if maior_valor == 0:
+        return 0.0
+    
+    percentual_diferenca = diferenca / maior_valor
+    
+    if percentual_diferenca <= tolerancia_percentual:
+        return 1.0 - percentual_diferenca
+    
+    return 0.0
+
+def calcular_similaridade_data(data1, data2, tolerancia_dias=TOLERANCIA_DIAS_VENCIMENTO):
+    """Calcula similaridade entre datas com tolerância"""
+    if data1 == data2:
+        return 1.0
+    
+    diferenca_dias = abs((data1 - data2).days)
+    
+    if diferenca_dias <= tolerancia_dias:
+        return 1.0 - (diferenca_dias / tolerancia_dias)
+    
+    return 0.0
+
+def calcular_fatores(transacao, conta):
+    """Calcula a confiança e os fatores numéricos de um par transação/conta"""
+    confianca_total = 0.0
+    
+    # Similaridade de valor (peso 40%)
+    sim_valor = calcular_similaridade_valor(float(transacao.valor), float(conta.valor_esperado))
+    confianca_total += sim_valor * PESO_VALOR
+    
+    # Similaridade de nome/CPF (peso 30%)
+    sim_nome = 0.0
+    if transacao.nome_pagador and conta.cliente_nome:
+        sim_nome = calcular_similaridade_texto(transacao.nome_pagador, conta.cliente_nome)
+    
+    sim_cpf = 0.0
+    if transacao.cpf_cnpj_pagador and conta.cliente_cpf_cnpj:
+        sim_cpf = 1.0 if transacao.cpf_cnpj_pagador == conta.cliente_cpf_cnpj else 0.0
+    
+    sim_identificacao = max(sim_nome, sim_cpf)
+    confianca_total += sim_identificacao * PESO_IDENTIFICACAO
+    
+    # Similaridade de data (peso 20%)
+    sim_data = 0.0
+    if conta.data_vencimento:
+        sim_data = calcular_similaridade_data(transacao.data_transacao, conta.data_vencimento)
+    else:
+        # Se não há data de vencimento, considera proximidade com data de criação
+        sim_data = calcular_similaridade_data(transacao.data_transacao, conta.data_criacao.date(), tolerancia_dias=TOLERANCIA_DIAS_CRIACAO)
+    
+    confianca_total += sim_data * PESO_DATA
+    
+    # Busca por número do pedido na descrição (peso 10%)
+    sim_pedido = 0.0
+    if conta.numero_pedido and transacao.descricao:
+        if conta.numero_pedido in transacao.descricao:
+            sim_pedido = 1.0
+    
+    confianca_total += sim_pedido * PESO_PEDIDO
+    
+    return confianca_total, (sim_valor, sim_identificacao, sim_data, sim_pedido)
+
+def colunas_fatores(fatores):
+    """Fatores numéricos nas colunas pontuacao_* de Conciliacao"""
+    return dict(zip(COLUNAS_FATORES, fatores))
+
+def descrever_fatores(fatores):
+    """Textos dos fatores exibidos nas sugestões e observações"""
+    sim_valor, sim_identificacao, sim_data, sim_pedido = fatores
+    return [
+        f"Valor: {sim_valor:.2f}",
+        f"Identificação: {sim_identificacao:.2f}",
+        f"Data: {sim_data:.2f}",
+        f"Pedido: {sim_pedido:.2f}"
+    ]
+
+def chave_par(transacao, conta):
+    """Chave do cache: ids e versões (data_atualizacao) das duas linhas"""
+    if transacao.id is None or conta.id is None:
+        return None
+    return (transacao.id, transacao.data_atualizacao, conta.id, conta.data_atualizacao)
+
+def consultar_cache(chave):
+    """Pontuação guardada para o par, ou None"""
+    if chave is None:
+        return None
+    
+    with _trava_cache:
+        pontuacao = _cache_pares.get(chave)
+        if pontuacao is None:
+            estatisticas_pontuacao['cache_faltas'] += 1
+            return None
+        _cache_pares.move_to_end(chave)
+        estatisticas_pontuacao['cache_acertos'] += 1
+        return pontuacao
+
+def guardar_cache(chave, pontuacao):
+    """Guarda a pontuação do par, descartando a usada há mais tempo"""
+    if chave is None:
+        return
+    
+    with _trava_cache:
+        _cache_pares[chave] = pontuacao
+        _cache_pares.move_to_end(chave)
+        if len(_cache_pares) > TAMANHO_CACHE_PONTUACAO:
+            _cache_pares.popitem(last=False)
+
+def limpar_cache_pontuacao():
+    """Esvazia o cache de pares"""
+    with _trava_cache:
+        _cache_pares.clear()
+
+def pontuar_par(transacao, conta):
+    """Calcula a confiança e os fatores de um par transação/conta
+    
+    O resultado fica no cache de pares, compartilhado por sugestões,
+    conciliação manual e automática; qualquer alteração em uma das linhas
+    muda data_atualizacao e, com ela, a chave.
+    """
+    chave = chave_par(transacao, conta)
+    pontuacao = consultar_cache(chave)
+    if pontuacao is None:
+        pontuacao = calcular_fatores(transacao, conta)
+        guardar_cache(chave, pontuacao)
+    
+    confianca, fatores = pontuacao
+    return {
+        'conta': conta,
+        'confianca': confianca,
+        'pontuacoes': fatores,
+        'fatores': descrever_fatores(fatores)
+    }
+
+def encontrar_correspondencias_automaticas(transacao, limite=None, contas=None, piso=CONFIANCA_MINIMA_CANDIDATO, estatisticas=None, incluir_vencidas=True):
+    """Encontra possíveis correspondências para uma transação
+    
+    Sem `limite`, devolve todas as contas com confiança mínima. Com `limite`,
+    devolve só as melhores, calculadas por selecionar_melhores. `contas`
+    permite reaproveitar a lista de pendentes já carregada pelo chamador e
+    `estatisticas` recebe a contagem de pares podados. Com `incluir_vencidas`
+    falso, contas marcadas como vencidas ficam de fora.
+    """
+    # Busca contas a receber em aberto da mesma empresa
+    if contas is None:
+        contas = carregar_contas_pendentes(transacao.empresa, incluir_vencidas)
+    
+    if limite is not None:
+        return selecionar_melhores(transacao, contas, limite, piso, estatisticas)
+    
+    correspondencias = []
+    
+    for conta in contas:
+        correspondencia = pontuar_par(transacao, conta)
+        
+        # Adiciona à lista se confiança mínima
+        if correspondencia['confianca'] >= piso:
+            correspondencias.append(correspondencia)
+    
+    # Ordena por confiança decrescente
+    correspondencias.sort(key=lambda x: x['confianca'], reverse=True)
+    
+    return correspondencias
+
+def carregar_contas_pendentes(empresa=None, incluir_vencidas=True):
+    """Contas em aberto da empresa, na ordem usada para desempate"""
+    return ContaReceber.query.filter(
+        ContaReceber.status.in_(status_em_aberto(incluir_vencidas)),
+        mesma_empresa(ContaReceber.empresa, empresa)
+    ).order_by(ContaReceber.id).all()
+
+def registrar_podas(avaliados, podados, estatisticas=None):
+    """Soma os pares avaliados e descartados ao contador do processo (e ao do chamador)"""
+    with _trava_estatisticas:
+        estatisticas_pontuacao['pares_avaliados'] += avaliados
+        estatisticas_pontuacao['pares_podados'] += podados
+    
+    if estatisticas is not None:
+        estatisticas['pares_avaliados'] = estatisticas.get('pares_avaliados', 0) + avaliados
+        estatisticas['pares_podados'] = estatisticas.get('pares_podados', 0) + podados
+
+def obter_estatisticas_pontuacao():
+    """Cópia dos contadores de pares avaliados e podados"""
+    with _trava_estatisticas:
+        return dict(estatisticas_pontuacao)
+
+def selecionar_melhores(transacao, contas, limite, piso=CONFIANCA_MINIMA_CANDIDATO, estatisticas=None):
+    """Devolve as `limite` contas de maior confiança sem pontuar todas por completo
+    
+    Os fatores são calculados do mais barato e pesado ao mais caro (valor,
+    data, CPF/CNPJ, pedido e, por último, a similaridade de nome). Depois de
+    cada fator, a confiança máxima ainda possível é comparada com o piso e
+    com a pior das melhores já encontradas (topo de um heap de tamanho
+    `limite`); se não alcança, a conta é descartada. A soma final segue a
+    mesma ordem de pontuar_par, então confiança e ordem são as mesmas da
+    pontuação completa, e os textos de fatores só são montados para as
+    contas devolvidas. Pares já no cache são reaproveitados e os pontuados
+    por completo entram nele.
+    """
+    valor = float(transacao.valor)
+    data_transacao = transacao.data_transacao
+    nome_pagador = transacao.nome_pagador
+    cpf_pagador = transacao.cpf_cnpj_pagador
+    descricao = transacao.descricao
+    
+    melhores = []  # heap de (confianca, -posicao, conta, fatores)
+    podados = 0
+    
+    for posicao, conta in enumerate(contas):
+        corte = melhores[0][0] if len(melhores) >= limite else piso
+        corte -= EPSILON_PONTUACAO
+        
+        chave = chave_par(transacao, conta)
+        pontuacao = consultar_cache(chave)
+        
+        if pontuacao is None:
+            # Valor (peso 40%)
+            sim_valor = calcular_similaridade_valor(valor, float(conta.valor_esperado))
+            if sim_valor * PESO_VALOR + PESO_IDENTIFICACAO + PESO_DATA + PESO_PEDIDO < corte:
+                podados += 1
+                continue
+            
+            # Data (peso 20%)
+            if conta.data_vencimento:
+                sim_data = calcular_similaridade_data(data_transacao, conta.data_vencimento)
+            else:
+                sim_data = calcular_similaridade_data(data_transacao, conta.data_criacao.date(), tolerancia_dias=TOLERANCIA_DIAS_CRIACAO)
+            if sim_valor * PESO_VALOR + PESO_IDENTIFICACAO + sim_data * PESO_DATA + PESO_PEDIDO < corte:
+                podados += 1
+                continue
+            
+            # CPF/CNPJ igual já garante a identificação máxima
+            sim_cpf = 0.0
+            if cpf_pagador and conta.cliente_cpf_cnpj:
+                sim_cpf = 1.0 if cpf_pagador == conta.cliente_cpf_cnpj else 0.0
+            
+            # Pedido (peso 10%)
+            sim_pedido = 0.0
+            if conta.numero_pedido and descricao:
+                if conta.numero_pedido in descricao:
+                    sim_pedido = 1.0
+            if sim_valor * PESO_VALOR + PESO_IDENTIFICACAO + sim_data * PESO_DATA + sim_pedido * PESO_PEDIDO < corte:
+                podados += 1
+                continue
+            
+            # Nome, o fator mais caro, só quando ainda pode mudar o resultado
+            sim_nome = 0.0
+            if sim_cpf < 1.0 and nome_pagador and conta.cliente_nome:
+                sim_nome = calcular_similaridade_texto(nome_pagador, conta.cliente_nome)
+            sim_identificacao = max(sim_nome, sim_cpf)
+            
+            confianca = 0.0
+            confianca += sim_valor * PESO_VALOR
+            confianca += sim_identificacao * PESO_IDENTIFICACAO
+            confianca += sim_data * PESO_DATA
+            confianca += sim_pedido * PESO_PEDIDO
+            
+            pontuacao = (confianca, (sim_valor, sim_identificacao, sim_data, sim_pedido))
+            guardar_cache(chave, pontuacao)
+        
+        confianca, fatores = pontuacao
+        if confianca < piso:
+            continue
+        
+        item = (confianca, -posicao, conta, fatores)
+        if len(melhores) < limite:
+            heapq.heappush(melhores, item)
+        elif item[:2] > melhores[0][:2]:
+            heapq.heapreplace(melhores, item)
+    
+    registrar_podas(len(contas), podados, estatisticas)
+    
+    melhores.sort(key=lambda item: item[:2], reverse=True)
+    return [
+        {'conta': conta, 'confianca': confianca, 'pontuacoes': fatores, 'fatores': descrever_fatores(fatores)}
+        for confianca, _, conta, fatores in melhores
+    ]
+
+def expressao_similaridade_data(coluna, data_transacao, tolerancia_dias):
+    """CASE com o peso de cada dia da janela de tolerância (mesma regra de calcular_similaridade_data)"""
+    pesos = {
+        data_transacao + timedelta(days=deslocamento): 1.0 - (abs(deslocamento) / tolerancia_dias)
+        for deslocamento in range(-tolerancia_dias + 1, tolerancia_dias)
+    }
+    return db.case(pesos, value=coluna, else_=0.0)
+
+def dobrar_texto_python(texto):
+    """Mesma normalização de calcular_similaridade_texto"""
+    return texto.lower().strip() if texto is not None else None
+
+class dobrar_texto(GenericFunction):
+    """Texto em minúsculas e sem espaços nas pontas, como em calcular_similaridade_texto"""
+    type = db.String()
+    inherit_cache = True
+
+@compiles(dobrar_texto)
+def compilar_dobrar_texto(elemento, compilador, **kw):
+    return f'lower(trim({compilador.process(elemento.clauses, **kw)}))'
+
+@compiles(dobrar_texto, 'sqlite')
+def compilar_dobrar_texto_sqlite(elemento, compilador, **kw):
+    # O lower do SQLite só converte ASCII ('JOSÉ' viraria 'josÉ'): usa a função registrada na conexão
+    return f'dobrar_texto({compilador.process(elemento.clauses, **kw)})'
+
+@event.listens_for(Engine, 'connect')
+def registrar_dobrar_texto(conexao, _):
+    """Registra dobrar_texto nas conexões SQLite"""
+    if isinstance(conexao, sqlite3.Connection):
+        conexao.create_function('dobrar_texto', 1, dobrar_texto_python, deterministic=True)
+
+def pontuar_candidatas(transacao, consulta, limite, correspondencias):
+    """Pontua as contas de `consulta` (ordenadas pelo limite superior) em páginas
+    
+    Acrescenta as candidatas a `correspondencias`, mantida em ordem, e para
+    assim que as `limite` melhores superam o limite da próxima conta.
+    """
+    tamanho_pagina = limite * FOLGA_SUGESTOES_SQL
+    deslocamento = 0
+    
+    while True:
+        pagina = db.session.execute(consulta.limit(tamanho_pagina).offset(deslocamento)).all()
+        
+        for conta, maximo in pagina:
+            # Nenhuma conta restante pode superar as já escolhidas
+            if len(correspondencias) >= limite and correspondencias[limite - 1]['confianca'] > maximo + EPSILON_PONTUACAO:
+                return
+            
+            correspondencia = pontuar_par(transacao, conta)
+            if correspondencia['confianca'] >= CONFIANCA_MINIMA_CANDIDATO:
+                correspondencias.append(correspondencia)
+                correspondencias.sort(key=lambda x: (-x['confianca'], x['conta'].id))
+        
+        if len(pagina) < tamanho_pagina:
+            return
+        deslocamento += tamanho_pagina
+
+def sugerir_correspondencias_sql(transacao, limite=5, incluir_vencidas=True):
+    """Busca as melhores contas para uma transação com a pontuação feita no banco
+    
+    Só entram contas em aberto (pendentes e, com `incluir_vencidas`,
+    vencidas) da mesma empresa da transação, lidas em duas etapas:
+    
+    1. As contas achadas por faixas de índice, unidas com UNION: valor
+       dentro da tolerância de 5%, vencimento (ou criação) dentro da janela
+       de datas e CPF/CNPJ igual.
+    2. As demais só pontuam por nome e pedido (no máximo 0.3 + 0.1), então
+       só são procuradas, sem índice, quando ainda podem entrar entre as
+       `limite` melhores: palavra do pagador no nome do cliente (cobre
+       nome igual e palavras em outra ordem), nome do cliente contendo o
+       do pagador ou número do pedido na descrição.
+    
+    Em cada etapa o banco calcula um limite superior da confiança (valor,
+    data e pedido exatos; identificação 1.0 quando há CPF igual, um nome
+    contém o outro ou alguma palavra do pagador aparece no nome do
+    cliente) e devolve as contas em ORDER BY desse limite. Os nomes são
+    comparados com dobrar_texto, a mesma normalização do Python (no
+    SQLite, a própria função Python). Cada conta lida é pontuada com
+    pontuar_par, então confiança, fatores e ordem são os do cálculo em
+    Python.
+    """
+    valor = float(transacao.valor)
+    data_transacao = transacao.data_transacao
+    valor_esperado = db.cast(ContaReceber.valor_esperado, db.Float)
+    nome_conta = dobrar_texto(ContaReceber.cliente_nome)
+    escopo = [
+        ContaReceber.status.in_(status_em_aberto(incluir_vencidas)),
+        mesma_empresa(ContaReceber.empresa, transacao.empresa)
+    ]
+    
+    # Janela de valor arredondada para fora, para usar o índice em valor_esperado
+    valor_decimal = Decimal(transacao.valor)
+    valor_minimo = (valor_decimal * Decimal(1 - TOLERANCIA_VALOR)).quantize(Decimal('0.01'), rounding=ROUND_FLOOR)
+    valor_maximo = (valor_decimal / Decimal(1 - TOLERANCIA_VALOR)).quantize(Decimal('0.01'), rounding=ROUND_CEILING)
+    
+    # Etapa 1: cada filtro usa um índice (empresa, status, coluna) ou (empresa, CPF/CNPJ)
+    faixas = [
+        ContaReceber.valor_esperado.between(valor_minimo, valor_maximo),
+        ContaReceber.data_vencimento.between(
+            data_transacao - timedelta(days=TOLERANCIA_DIAS_VENCIMENTO),
+            data_transacao + timedelta(days=TOLERANCIA_DIAS_VENCIMENTO)
+        ),
+        db.and_(
+            ContaReceber.data_criacao >= data_transacao - timedelta(days=TOLERANCIA_DIAS_CRIACAO),
+            ContaReceber.data_criacao < data_transacao + timedelta(days=TOLERANCIA_DIAS_CRIACAO + 1),
+            ContaReceber.data_vencimento.is_(None)
+        )
+    ]
+    # Etapa 2: comparações de texto, sem índice
+    textos = []
+    
+    # Valor
+    maior_valor = db.case((valor_esperado > valor, valor_esperado), else_=valor)
+    sim_valor = db.case(
+        (valor_esperado == valor, 1.0),
+        (
+            db.and_(maior_valor > 0, db.func.abs(valor_esperado - valor) / maior_valor <= TOLERANCIA_VALOR),
+            1.0 - db.func.abs(valor_esperado - valor) / maior_valor
+        ),
+        else_=0.0
+    )
+    
+    # Identificação: limite superior de max(nome, CPF/CNPJ)
+    identificacao = []
+    if transacao.cpf_cnpj_pagador:
+        cpf_igual = ContaReceber.cliente_cpf_cnpj == transacao.cpf_cnpj_pagador
+        faixas.append(cpf_igual)
+        identificacao.append(cpf_igual)
+    if transacao.nome_pagador:
+        # Identificação 1.0 só pelo nome exige o nome contido ou uma palavra em comum
+        nome_pagador = dobrar_texto_python(transacao.nome_pagador)
+        palavras = [nome_conta.contains(palavra) for palavra in sorted(set(re.findall(r'\w+', nome_pagador)))]
+        textos.append(nome_conta.contains(nome_pagador))
+        textos.extend(palavras)
+        identificacao.append(nome_conta.contains(nome_pagador))
+        identificacao.append(db.literal(nome_pagador).contains(nome_conta))
+        identificacao.extend(palavras)
+    sim_identificacao = db.case((db.or_(*identificacao), 1.0), else_=0.0) if identificacao else db.literal(0.0)
+    
+    # Data: vencimento, ou criação quando não há vencimento
+    sim_data = db.case(
+        (
+            ContaReceber.data_vencimento.isnot(None),
+            expressao_similaridade_data(ContaReceber.data_vencimento, data_transacao, TOLERANCIA_DIAS_VENCIMENTO)
+        ),
+        else_=expressao_similaridade_data(
+            db.func.date(ContaReceber.data_criacao, type_=db.Date), data_transacao, TOLERANCIA_DIAS_CRIACAO
+        )
+    )
+    
+    # Número do pedido na descrição
+    if transacao.descricao:
+        pedido_na_descricao = db.and_(
+            ContaReceber.numero_pedido != '', db.literal(transacao.descricao).contains(ContaReceber.numero_pedido)
+        )
+        textos.append(pedido_na_descricao)
+        sim_pedido = db.case((pedido_na_descricao, 1.0), else_=0.0)
+    else:
+        sim_pedido = db.literal(0.0)
+    
+    limite_superior = (
+        sim_valor * PESO_VALOR
+        + sim_identificacao * PESO_IDENTIFICACAO
+        + sim_data * PESO_DATA
+        + sim_pedido * PESO_PEDIDO
+    ).label('limite_superior')
+    
+    def consulta(*condicoes):
+        return db.select(ContaReceber, limite_superior).where(
+            *condicoes,
+            limite_superior >= CONFIANCA_MINIMA_CANDIDATO - EPSILON_PONTUACAO
+        ).order_by(limite_superior.desc(), ContaReceber.id)
+    
+    indexadas = db.union(*[db.select(ContaReceber.id).where(*escopo, faixa) for faixa in faixas])
+    correspondencias = []
+    pontuar_candidatas(transacao, consulta(ContaReceber.id.in_(indexadas)), limite, correspondencias)
+    
+    # Fora das faixas, valor e data são 0: a confiança não passa de identificação + pedido
+    maximo_por_texto = PESO_IDENTIFICACAO + PESO_PEDIDO + EPSILON_PONTUACAO
+    if textos and (len(correspondencias) < limite or correspondencias[limite - 1]['confianca'] <= maximo_por_texto):
+        pontuar_candidatas(
+            transacao, consulta(*escopo, ~ContaReceber.id.in_(indexadas), db.or_(*textos)), limite, correspondencias
+        )
+    
+    return correspondencias[:limite]
@@ -0,0 +1,160 @@
+import gzip
+import math
+import re
+from functools import lru_cache
+from flask import current_app, request
+from src.models.conciliacao import db
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Serialização das listagens grandes: as linhas vêm da consulta como tuplas
+# e cada coluna tem um conversor pronto (mesmas regras dos to_dict dos
+# modelos). O JSON é gerado com orjson quando disponível e o resultado é
+# byte a byte igual ao do jsonify do Flask (chaves ordenadas, ASCII,
+# separadores compactos e quebra de linha final).
+
+# Escapes \\UXXXXXXXX gerados por backslashreplace (caracteres fora do BMP)
+ESCAPE_ASTRAL = re.compile(rb'\\U([0-9a-f]{8})')
+
+class FloatComExpoente(float):
+    """Float que a biblioteca padrão escreve diferente do orjson (1e-05, NaN)
+    
+    O orjson recusa subclasses de float, então respostas com esses valores
+    usam o caminho padrão.
+    """
+
+def float_compativel(valor):
+    """Indica se orjson e json escrevem o valor da mesma forma"""
+    return valor == 0 or (math.isfinite(valor) and 1e-4 <= abs(valor) < 1e16)
+
+def codificar_float(valor):
+    """Colunas Float: valor direto, marcado quando precisa do caminho padrão"""
+    if valor is None or float_compativel(valor):
+        return valor
+    return FloatComExpoente(valor)
+
+def codificar_numeric(valor):
+    """Colunas Numeric, com a mesma regra do to_dict: float(x) if x else 0"""
+    return codificar_float(float(valor)) if valor else 0
+
+def codificar_data(valor):
+    """Colunas Date e DateTime em ISO 8601"""
+    return valor.isoformat() if valor else None
+
+def codificador_coluna(coluna):
+    """Conversor de uma coluna, ou None quando o valor vai direto para o JSON"""
+    tipo = coluna.type
+    if isinstance(tipo, db.Float):
+        return codificar_float
+    if isinstance(tipo, db.Numeric):
+        return codificar_numeric
+    if isinstance(tipo, (db.Date, db.DateTime)):
+        return codificar_data
+    return None
+
+@lru_cache(maxsize=None)
+def campos_modelo(modelo):
+    """Chaves do to_dict do modelo, na mesma ordem, com coluna e conversor"""
+    chaves = modelo().to_dict().keys()
+    return tuple(
+        (chave, modelo.__table__.c[chave], codificador_coluna(modelo.__table__.c[chave]))
+        for chave in chaves
+    )
+
+def colunas_modelo(modelo):
+    """Colunas a selecionar para serializar o modelo"""
+    return [coluna for _, coluna, _ in campos_modelo(modelo)]
+
+@lru_cache(maxsize=None)
+def codificador_linhas(modelo):
+    """Função que converte a tupla de colunas_modelo no dicionário do to_dict"""
+    chaves = [chave for chave, _, _ in campos_modelo(modelo)]
+    conversores = [
+        (indice, codificador)
+        for indice, (_, _, codificador) in enumerate(campos_modelo(modelo))
+        if codificador is not None
+    ]
+    
+    def codificar(valores):
+        valores = list(valores)
+        for indice, codificador in conversores:
+            valores[indice] = codificador(valores[indice])
+        return dict(zip(chaves, valores))
+    
+    return codificar
+
+def listar_conciliacoes_completas(consulta, modelo_conciliacao, modelo_transacao, modelo_conta):
+    """Conciliações com transação e conta aninhadas, como na listagem
+    
+    A consulta deve selecionar as colunas_modelo dos três modelos, nessa ordem.
+    """
+    codificar_conciliacao = codificador_linhas(modelo_conciliacao)
+    codificar_transacao = codificador_linhas(modelo_transacao)
+    codificar_conta = codificador_linhas(modelo_conta)
+    fim_conciliacao = len(campos_modelo(modelo_conciliacao))
+    fim_transacao = fim_conciliacao + len(campos_modelo(modelo_transacao))
+    
+    resultado = []
+    for linha in db.session.execute(consulta):
+        item = codificar_conciliacao(linha[:fim_conciliacao])
+        item['transacao'] = codificar_transacao(linha[fim_conciliacao:fim_transacao])
+        item['conta_receber'] = codificar_conta(linha[fim_transacao:])
+        resultado.append(item)
+    
+    return resultado
+
+def escapar_par_substituto(correspondencia):
+    """\\UXXXXXXXX vira o par \\uXXXX\\uXXXX, como em ensure_ascii"""
+    codigo = int(correspondencia.group(1), 16) - 0x10000
+    return b'\\u%04x\\u%04x' % (0xD800 | (codigo >> 10), 0xDC00 | (codigo & 0x3FF))
+
+def escapar_nao_ascii(corpo):
+    """Aplica ao JSON do orjson os escapes de ensure_ascii
+    
+    Tudo é feito com substituições em bloco: as barras já escapadas (\\\\)
+    são trocadas por NUL (o orjson nunca escreve NUL cru), backslashreplace
+    gera \\xHH/\\uHHHH/\\UHHHHHHHH e os \\xHH viram \\u00HH.
+    """
+    corpo = corpo.decode().replace('\\\\', '\x00').encode('ascii', 'backslashreplace')
+    corpo = corpo.replace(b'\\x', b'\\u00')
+    if b'\\U' in corpo:
+        corpo = ESCAPE_ASTRAL.sub(escapar_par_substituto, corpo)
+    return corpo.replace(b'\x7f', b'\\u007f').replace(b'\x00', b'\\\\')
+
+def serializar(dados, indentado=False):
+    """Gera o corpo JSON com os mesmos bytes do jsonify"""
+    if orjson is not None and not indentado:
+        try:
+            corpo = orjson.dumps(dados, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass
+        else:
+            if not corpo.isascii() or b'\x7f' in corpo:
+                corpo = escapar_nao_ascii(corpo)
+            return corpo + b'\n'
+    
+    argumentos = {'indent': 2} if indentado else {'separators': (',', ':')}
+    return f'{current_app.json.dumps(dados, **argumentos)}\n'.encode()
+
+def resposta_json(dados, status=200):
+    """Substitui jsonify nas listagens grandes, com gzip quando o cliente aceita
+    
+    Os floats de `dados` devem passar por codificar_float (como fazem os
+    conversores das colunas) para sair iguais ao jsonify.
+    """
+    provedor = current_app.json
+    indentado = (provedor.compact is None and current_app.debug) or provedor.compact is False
+    
+    resposta = current_app.response_class(serializar(dados, indentado), status=status, mimetype=provedor.mimetype)
+    
+    minimo = current_app.config.get('RESPOSTA_GZIP_MINIMO')
+    if minimo is not None and resposta.content_length >= minimo:
+        resposta.vary.add('Accept-Encoding')
+        if request.accept_encodings['gzip'] > 0:
+            resposta.set_data(gzip.compress(resposta.get_data(), compresslevel=6))
+            resposta.headers['Content-Encoding'] = 'gzip'
+    
+    return resposta
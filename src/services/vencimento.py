@@ -0,0 +1,196 @@
+import threading
+from datetime import date, timedelta
+from src.models.conciliacao import db, ContaReceber, FaixaVencimento
+
+# Faixas de atraso (dias após o vencimento): nome, primeiro e último dia
+FAIXAS_VENCIMENTO = (
+    ('0-30', 0, 30),
+    ('31-60', 31, 60),
+    ('61-90', 61, 90),
+    ('90+', 91, None),
+)
+
+# Chave do advisory lock que serializa a varredura entre processos (PostgreSQL)
+CHAVE_TRAVA_VARREDURA = 40_401_001
+
+def status_conta_em_aberto(data_vencimento, hoje=None):
+    """Status de uma conta que volta a ficar em aberto: vencido ou pendente"""
+    hoje = hoje or date.today()
+    return 'vencido' if data_vencimento is not None and data_vencimento < hoje else 'pendente'
+
+def expressao_status_em_aberto(hoje=None):
+    """CASE com o mesmo critério de status_conta_em_aberto, para UPDATEs em lote"""
+    hoje = hoje or date.today()
+    return db.case((ContaReceber.data_vencimento < hoje, 'vencido'), else_='pendente')
+
+def marcar_vencidas(hoje):
+    """Marca como vencidas as contas pendentes com vencimento anterior a hoje
+    
+    Um único UPDATE sobre o índice (status, data_vencimento). Contas vencidas
+    cujo vencimento foi adiado (ou removido) voltam para pendente.
+    """
+    vencidas = db.session.execute(
+        db.update(ContaReceber)
+        .where(ContaReceber.status == 'pendente', ContaReceber.data_vencimento < hoje)
+        .values(status='vencido')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    
+    reabertas = db.session.execute(
+        db.update(ContaReceber)
+        .where(
+            ContaReceber.status == 'vencido',
+            db.or_(ContaReceber.data_vencimento.is_(None), ContaReceber.data_vencimento >= hoje)
+        )
+        .values(status='pendente')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    
+    return vencidas, reabertas
+
+def expressao_faixa(hoje):
+    """CASE que classifica data_vencimento nas faixas de atraso"""
+    return db.case(
+        *[
+            (ContaReceber.data_vencimento >= hoje - timedelta(days=ultimo_dia), nome)
+            for nome, _, ultimo_dia in FAIXAS_VENCIMENTO
+            if ultimo_dia is not None
+        ],
+        else_=FAIXAS_VENCIMENTO[-1][0]
+    )
+
+def atualizar_faixas_vencimento(hoje):
+    """Recalcula os totais por empresa e faixa com um único GROUP BY"""
+    faixa = expressao_faixa(hoje).label('faixa')
+    totais = db.session.execute(
+        db.select(
+            ContaReceber.empresa,
+            faixa,
+            db.func.count(ContaReceber.id),
+            db.func.coalesce(db.func.sum(ContaReceber.valor_esperado), 0)
+        )
+        .where(ContaReceber.status == 'vencido')
+        .group_by(ContaReceber.empresa, faixa)
+    ).all()
+    
+    db.session.execute(db.delete(FaixaVencimento).execution_options(synchronize_session=False))
+    if totais:
+        db.session.execute(db.insert(FaixaVencimento), [
+            {
+                'empresa': empresa,
+                'faixa': nome_faixa,
+                'quantidade': quantidade,
+                'valor_total': valor_total,
+                'data_referencia': hoje
+            }
+            for empresa, nome_faixa, quantidade, valor_total in totais
+        ])
+    
+    return len(totais)
+
+def obter_trava_varredura():
+    """Trava a varredura na transação atual; False se outro processo já a executa
+    
+    Cada worker do gunicorn tem o seu agendador, e duas varreduras simultâneas
+    no PostgreSQL apagariam e inseririam as faixas em paralelo (duplicando as
+    de empresa nula, que a chave única não alcança). O advisory lock é
+    liberado no commit ou rollback. No SQLite as escritas já são serializadas
+    pelo próprio banco.
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return True
+    return db.session.scalar(db.select(db.func.pg_try_advisory_xact_lock(CHAVE_TRAVA_VARREDURA)))
+
+def executar_varredura_vencimento(hoje=None):
+    """Marca as contas vencidas e recalcula as faixas de atraso em uma transação
+    
+    Se outra varredura estiver em andamento, não faz nada e devolve
+    executada=False.
+    """
+    hoje = hoje or date.today()
+    
+    try:
+        if not obter_trava_varredura():
+            db.session.rollback()
+            return {
+                'data_referencia': hoje.isoformat(),
+                'executada': False,
+                'contas_vencidas': 0,
+                'contas_reabertas': 0
+            }
+        
+        vencidas, reabertas = marcar_vencidas(hoje)
+        atualizar_faixas_vencimento(hoje)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return {
+        'data_referencia': hoje.isoformat(),
+        'executada': True,
+        'contas_vencidas': vencidas,
+        'contas_reabertas': reabertas
+    }
+
+def obter_faixas_vencimento(empresa=None):
+    """Totais por faixa (lidos da tabela de agregados), com zero nas faixas sem contas"""
+    consulta = FaixaVencimento.query
+    if empresa:
+        consulta = consulta.filter(FaixaVencimento.empresa == empresa)
+    
+    faixas = {nome: {'faixa': nome, 'quantidade': 0, 'valor_total': 0} for nome, _, _ in FAIXAS_VENCIMENTO}
+    data_referencia = None
+    
+    for linha in consulta.all():
+        faixa = faixas[linha.faixa]
+        faixa['quantidade'] += linha.quantidade or 0
+        faixa['valor_total'] += float(linha.valor_total) if linha.valor_total else 0
+        data_referencia = linha.data_referencia.isoformat()
+    
+    return {
+        'empresa': empresa,
+        'data_referencia': data_referencia,
+        'faixas': list(faixas.values())
+    }
+
+class AgendadorVencimento:
+    """Executa a varredura de vencimentos periodicamente em uma thread do processo
+    
+    A thread é iniciada na primeira requisição recebida pela aplicação, para
+    não rodar em comandos de linha de comando como init-db. Com vários
+    workers, cada um tem a sua thread e as varreduras simultâneas são
+    descartadas pela trava; para rodar em um único lugar, use
+    VENCIMENTO_INTERVALO_MINUTOS=0 e agende o comando varrer-vencimentos.
+    """
+    
+    def __init__(self, app, intervalo):
+        self.app = app
+        self.intervalo = intervalo
+        self._thread = None
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self.ultima_execucao = None
+    
+    def iniciar(self):
+        """Inicia a thread uma única vez"""
+        if self._thread is not None:
+            return
+        
+        with self._trava:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name='vencimento', daemon=True)
+                self._thread.start()
+    
+    def parar(self):
+        self._parar.set()
+    
+    def _executar(self):
+        while not self._parar.is_set():
+            with self.app.app_context():
+                try:
+                    self.ultima_execucao = executar_varredura_vencimento()
+                except Exception as e:
+                    self.app.logger.error(f'Erro na varredura de vencimentos: {e}')
+            
+            self._parar.wait(self.intervalo)
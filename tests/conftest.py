@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+@pytest.fixture
+def app(tmp_path):
+    """Aplicação com um banco SQLite em arquivo temporário (compartilhado entre threads)"""
+    from src.main import create_app
+    from src.models.conciliacao import db
+    
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'teste.db'}",
+        'VENCIMENTO_INTERVALO_MINUTOS': 0
+    })
+    with app.app_context():
+        db.create_all()
+    
+    yield app
+    
+    with app.app_context():
+        db.engine.dispose()
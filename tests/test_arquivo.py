@@ -0,0 +1,58 @@
+from datetime import date
+from decimal import Decimal
+
+from src.models.conciliacao import db, Extrato, Transacao, ContaReceber, Conciliacao
+from src.models.arquivo import TransacaoArquivo, PeriodoArquivado
+from src.routes.arquivo import arquivar_periodos
+
+def conciliar(data_transacao, pedido):
+    """Crédito conciliado com uma conta a receber na data informada"""
+    extrato = Extrato(nome_arquivo='arquivo.csv', status='concluido')
+    db.session.add(extrato)
+    db.session.flush()
+    
+    transacao = Transacao(
+        extrato_id=extrato.id, data_transacao=data_transacao, valor=Decimal('50.00'), tipo='credito',
+        status_conciliacao='conciliado'
+    )
+    conta = ContaReceber(numero_pedido=pedido, cliente_nome='Cliente', valor_esperado=Decimal('50.00'), status='pago')
+    db.session.add_all([transacao, conta])
+    db.session.flush()
+    
+    db.session.add(Conciliacao(transacao_id=transacao.id, conta_receber_id=conta.id, tipo_conciliacao='manual'))
+    db.session.commit()
+
+def test_meses_sem_transacoes_nao_sao_arquivados(app):
+    with app.app_context():
+        conciliar(date(2024, 1, 10), 'PED1')
+        
+        arquivados, ignorados = arquivar_periodos(date(2024, 12, 1))
+        
+        assert [periodo.mes for periodo in arquivados] == ['2024-01']
+        assert ignorados == []
+        assert PeriodoArquivado.query.count() == 1
+
+def test_lancamento_retroativo_arquiva_o_mes_de_novo(app):
+    with app.app_context():
+        conciliar(date(2024, 1, 10), 'PED1')
+        arquivar_periodos(date(2024, 1, 1))
+        
+        conciliar(date(2024, 1, 20), 'PED2')
+        arquivados, _ = arquivar_periodos(date(2024, 1, 1))
+        
+        assert [periodo.mes for periodo in arquivados] == ['2024-01']
+        assert PeriodoArquivado.query.one().total_transacoes == 2
+        assert Transacao.query.count() == 0
+        assert TransacaoArquivo.query.count() == 2
+
+def test_intervalo_so_com_data_fim_inclui_arquivo(app):
+    with app.app_context():
+        conciliar(date(2024, 1, 10), 'PED1')
+        arquivar_periodos(date(2024, 1, 1))
+        cliente = app.test_client()
+        
+        listagem = cliente.get('/api/conciliacao/listar?data_fim=2024-01-31').get_json()
+        exportacao = cliente.get('/api/conciliacao/exportar/csv?data_fim=2024-01-31').get_data(as_text=True)
+        
+        assert len(listagem['conciliacoes']) == 1
+        assert len(exportacao.strip().splitlines()) == 2
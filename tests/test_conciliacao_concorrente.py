@@ -0,0 +1,91 @@
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+
+from src.models.conciliacao import db, Extrato, Transacao, ContaReceber, Conciliacao
+from src.routes.conciliacao import executar_conciliacao_automatica
+
+TOTAL_PARES = 120
+EXECUCOES = 4
+
+def popular_pares(quantidade):
+    """Créditos pendentes, cada um com uma única conta correspondente (pedido, nome e valor)"""
+    extrato = Extrato(nome_arquivo='concorrencia.csv', status='concluido')
+    db.session.add(extrato)
+    db.session.flush()
+    
+    inicio = date(2025, 1, 1)
+    db.session.execute(db.insert(Transacao), [
+        {
+            'extrato_id': extrato.id,
+            'data_transacao': inicio + timedelta(days=indice % 300),
+            'valor': Decimal(1000 + indice * 37) / 100,
+            'tipo': 'credito',
+            'descricao': f'PIX CLIENTE{indice} PED{indice:05d}',
+            'nome_pagador': f'CLIENTE{indice}',
+            'status_conciliacao': 'pendente'
+        }
+        for indice in range(quantidade)
+    ])
+    db.session.execute(db.insert(ContaReceber), [
+        {
+            'numero_pedido': f'PED{indice:05d}',
+            'cliente_nome': f'Cliente{indice}',
+            'valor_esperado': Decimal(1000 + indice * 37) / 100,
+            'data_vencimento': inicio + timedelta(days=indice % 300),
+            'status': 'pendente'
+        }
+        for indice in range(quantidade)
+    ])
+    db.session.commit()
+
+def test_execucoes_simultaneas_dividem_o_trabalho(app):
+    with app.app_context():
+        popular_pares(TOTAL_PARES)
+    
+    barreira = threading.Barrier(EXECUCOES)
+    resultados = [None] * EXECUCOES
+    erros = []
+    
+    def executar(indice):
+        with app.app_context():
+            try:
+                barreira.wait()
+                resultados[indice], _ = executar_conciliacao_automatica(0.8, tamanho_lote=5)
+            except Exception as e:
+                erros.append(e)
+            finally:
+                db.session.remove()
+    
+    threads = [threading.Thread(target=executar, args=(indice,)) for indice in range(EXECUCOES)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+    
+    assert not erros
+    
+    # Todas as transações conciliadas, cada uma por uma única execução
+    feitas = [resultado['transacao_id'] for lista in resultados for resultado in lista]
+    assert len(feitas) == TOTAL_PARES
+    assert len(set(feitas)) == TOTAL_PARES
+    
+    # Mais de uma execução recebeu trabalho
+    assert sum(1 for lista in resultados if lista) > 1
+    
+    with app.app_context():
+        conciliacoes = db.session.execute(db.select(Conciliacao.transacao_id, Conciliacao.conta_receber_id)).all()
+        assert len(conciliacoes) == TOTAL_PARES
+        
+        # Cada conta a receber conciliada uma única vez, com o próprio crédito
+        assert len({conta_id for _, conta_id in conciliacoes}) == TOTAL_PARES
+        assert all(transacao_id == conta_id for transacao_id, conta_id in conciliacoes)
+        
+        assert db.session.scalar(
+            db.select(db.func.count()).select_from(ContaReceber).where(ContaReceber.status != 'pago')
+        ) == 0
+        assert db.session.scalar(
+            db.select(db.func.count()).select_from(Transacao).where(
+                db.or_(Transacao.status_conciliacao != 'conciliado', Transacao.reservado_por.isnot(None))
+            )
+        ) == 0
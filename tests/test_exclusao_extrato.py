@@ -0,0 +1,27 @@
+from datetime import date
+from decimal import Decimal
+
+from src.models.conciliacao import db, Extrato, Transacao
+
+def test_falha_na_exclusao_deixa_o_extrato_com_erro(app, monkeypatch):
+    def falhar(*args, **kwargs):
+        raise RuntimeError('falha simulada')
+    
+    monkeypatch.setattr('src.routes.extrato.excluir_transacoes_extrato', falhar)
+    
+    with app.app_context():
+        extrato = Extrato(nome_arquivo='exclusao.csv', status='concluido')
+        db.session.add(extrato)
+        db.session.flush()
+        db.session.add(Transacao(
+            extrato_id=extrato.id, data_transacao=date(2025, 3, 5), valor=Decimal('10.00'), tipo='credito'
+        ))
+        db.session.commit()
+        extrato_id = extrato.id
+    
+    resposta = app.test_client().delete(f'/api/extrato/{extrato_id}')
+    
+    assert resposta.status_code == 500
+    with app.app_context():
+        assert db.session.get(Extrato, extrato_id).status == 'erro'
+        assert db.session.scalar(db.select(db.func.count(Transacao.id))) == 1
@@ -0,0 +1,46 @@
+import zipfile
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+
+from src.models.conciliacao import db, Extrato, Transacao, ContaReceber, Conciliacao
+
+def conciliar(descricao, cliente_nome):
+    extrato = Extrato(nome_arquivo='exportacao.csv', status='concluido')
+    db.session.add(extrato)
+    db.session.flush()
+    
+    transacao = Transacao(
+        extrato_id=extrato.id, data_transacao=date(2025, 3, 10), valor=Decimal('80.00'), tipo='credito',
+        descricao=descricao, status_conciliacao='conciliado'
+    )
+    conta = ContaReceber(numero_pedido='PED1', cliente_nome=cliente_nome, valor_esperado=Decimal('80.00'), status='pago')
+    db.session.add_all([transacao, conta])
+    db.session.flush()
+    
+    db.session.add(Conciliacao(transacao_id=transacao.id, conta_receber_id=conta.id, tipo_conciliacao='manual'))
+    db.session.commit()
+
+def test_xlsx_grava_textos_do_usuario_como_texto(app):
+    with app.app_context():
+        conciliar('=HYPERLINK("http://exemplo.com","clique")', 'http://exemplo.com/cliente')
+        
+        resposta = app.test_client().get('/api/conciliacao/exportar/xlsx')
+        
+        assert resposta.status_code == 200
+        with zipfile.ZipFile(BytesIO(resposta.data)) as pacote:
+            planilha = pacote.read('xl/worksheets/sheet1.xml').decode()
+            assert '<f>' not in planilha
+            assert '<hyperlinks>' not in planilha
+            assert '=HYPERLINK' in planilha
+
+def test_filtro_status_usa_o_tipo_da_conciliacao(app):
+    with app.app_context():
+        conciliar('PIX CLIENTE', 'Cliente')
+        cliente = app.test_client()
+        
+        manual = cliente.get('/api/conciliacao/exportar/csv?status=manual').get_data(as_text=True)
+        automatica = cliente.get('/api/conciliacao/exportar/csv?status=automatica').get_data(as_text=True)
+        
+        assert len(manual.strip().splitlines()) == 2
+        assert len(automatica.strip().splitlines()) == 1
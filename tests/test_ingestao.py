@@ -0,0 +1,41 @@
+import pytest
+
+from src.models.conciliacao import db, Transacao
+from src.services.ingestao import AgrupadorIngestao
+from src.services.leitor_extrato import converter_transacao_json
+
+@pytest.mark.parametrize('dados, mensagem', [
+    ({'valor': '10.00', 'cpf_cnpj_pagador': '1' * 21}, 'cpf_cnpj_pagador excede 20 caracteres'),
+    ({'valor': '10.00', 'empresa': 'E' * 51}, 'empresa excede 50 caracteres'),
+    ({'valor': '10.00', 'documento': 'D' * 101}, 'documento excede 100 caracteres'),
+    ({'valor': '10.00', 'nome_pagador': 'N' * 256}, 'nome_pagador excede 255 caracteres'),
+    ({'valor': '1e30'}, 'Valor fora do limite'),
+    ({'valor': '10000000000000'}, 'Valor fora do limite'),
+])
+def test_converter_rejeita_campos_fora_da_coluna(dados, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        converter_transacao_json(dados)
+
+def test_ingestao_responde_400_por_item(app):
+    resposta = app.test_client().post('/api/extrato/ingestao', json=[
+        {'valor': '10.00'},
+        {'valor': '1e30'},
+        {'valor': '10.00', 'nome_pagador': 'N' * 256}
+    ])
+    
+    assert resposta.status_code == 400
+    assert [detalhe['indice'] for detalhe in resposta.get_json()['detalhes']] == [1, 2]
+
+def test_lote_com_erro_grava_as_demais_transacoes(app, monkeypatch):
+    monkeypatch.setattr('src.services.ingestao.time.sleep', lambda _: None)
+    agrupador = AgrupadorIngestao(app)
+    lote = [converter_transacao_json({'valor': f'{indice + 1}.00', 'data_transacao': '2025-03-10'}) for indice in range(5)]
+    # Data obrigatória ausente: o INSERT desta transação falha
+    lote[2]['data_transacao'] = None
+    
+    with app.app_context():
+        agrupador._gravar(lote)
+        
+        assert db.session.scalar(db.select(db.func.count(Transacao.id))) == 4
+        assert agrupador.estatisticas['transacoes_gravadas'] == 4
+        assert agrupador.estatisticas['transacoes_descartadas'] == 1
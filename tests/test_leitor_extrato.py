@@ -0,0 +1,51 @@
+from datetime import date
+from decimal import Decimal
+
+from src.services.leitor_extrato import ler_csv_extrato
+
+def ler(texto):
+    return ler_csv_extrato(texto.encode('utf-8'))
+
+def test_ponto_e_virgula_com_milhar_e_virgula_decimal():
+    leitura = ler('Data;Histórico;Valor\n05/03/2025;PIX MARIA SOUZA;1.234,56\n06/03/2025;TARIFA;-12,90\n')
+    
+    assert [(t['data_transacao'], t['valor'], t['tipo']) for t in leitura['transacoes']] == [
+        (date(2025, 3, 5), Decimal('1234.56'), 'credito'),
+        (date(2025, 3, 6), Decimal('12.90'), 'debito'),
+    ]
+    assert leitura['perfil'] == "delimitador ';', data dmy, decimal ',', valor"
+
+def test_colunas_separadas_de_credito_e_debito():
+    leitura = ler('Data;Descrição;Crédito;Débito\n05/03/2025;TED JOAO;150,00;\n06/03/2025;BOLETO;;80,00\n')
+    
+    assert [(t['valor'], t['tipo']) for t in leitura['transacoes']] == [
+        (Decimal('150.00'), 'credito'),
+        (Decimal('80.00'), 'debito'),
+    ]
+
+def test_valor_com_indicador_de_debito():
+    leitura = ler('Data;Histórico;Valor\n05/03/2025;SAQUE;10,00 D\n06/03/2025;DEPOSITO;10,00 C\n')
+    
+    assert [(t['valor'], t['tipo']) for t in leitura['transacoes']] == [
+        (Decimal('10.00'), 'debito'),
+        (Decimal('10.00'), 'credito'),
+    ]
+
+def test_datas_sem_zero_a_esquerda():
+    dia_mes_ano = ler('Data;Histórico;Valor\n1/2/2025;PIX;10,00\n5/12/25;PIX;10,00\n')
+    ano_mes_dia = ler('data,valor\n2025-1-5,10.00\n')
+    
+    assert [t['data_transacao'] for t in dia_mes_ano['transacoes']] == [date(2025, 2, 1), date(2025, 12, 5)]
+    assert [t['data_transacao'] for t in ano_mes_dia['transacoes']] == [date(2025, 1, 5)]
+
+def test_nan_e_infinito_sao_ignorados():
+    leitura = ler('data,descricao,valor\n2025-03-05,A,NaN\n2025-03-06,B,Infinity\n2025-03-07,C,10.00\n')
+    
+    assert [t['descricao'] for t in leitura['transacoes']] == ['C']
+    assert leitura['motivos_ignoradas'] == {'valor_invalido': 2}
+
+def test_quebra_de_linha_dentro_de_aspas_e_coluna_docto():
+    leitura = ler('\n\nData;Histórico;Docto;Valor\r\n05/03/2025;"PIX MARIA\r\nSOUZA";123;50,00\r\n')
+    
+    assert leitura['linhas_ignoradas'] == 0
+    assert [(t['descricao'], t['documento']) for t in leitura['transacoes']] == [('PIX MARIA\r\nSOUZA', '123')]
@@ -0,0 +1,53 @@
+import sqlite3
+
+from src.main import create_app
+from src.models.conciliacao import db
+from src.models.migracao import atualizar_esquema
+
+# Tabelas como eram criadas antes das colunas de empresa, reserva e pontuação
+ESQUEMA_ANTERIOR = '''
+CREATE TABLE extrato (
+    id INTEGER NOT NULL PRIMARY KEY, nome_arquivo VARCHAR(255) NOT NULL, data_upload DATETIME,
+    banco VARCHAR(100), conta VARCHAR(50), periodo_inicio DATE, periodo_fim DATE,
+    total_transacoes INTEGER, status VARCHAR(50)
+);
+CREATE TABLE conta_receber (
+    id INTEGER NOT NULL PRIMARY KEY, numero_pedido VARCHAR(100), cliente_nome VARCHAR(255) NOT NULL,
+    cliente_cpf_cnpj VARCHAR(20), valor_esperado NUMERIC(15, 2) NOT NULL, data_vencimento DATE,
+    data_criacao DATETIME, status VARCHAR(50), observacoes TEXT
+);
+CREATE TABLE transacao (
+    id INTEGER NOT NULL PRIMARY KEY, extrato_id INTEGER NOT NULL REFERENCES extrato (id),
+    data_transacao DATE NOT NULL, valor NUMERIC(15, 2) NOT NULL, tipo VARCHAR(20) NOT NULL, descricao TEXT,
+    documento VARCHAR(100), nome_pagador VARCHAR(255), cpf_cnpj_pagador VARCHAR(20), banco_origem VARCHAR(100),
+    status_conciliacao VARCHAR(50), confianca_conciliacao FLOAT
+);
+CREATE TABLE conciliacao (
+    id INTEGER NOT NULL PRIMARY KEY, transacao_id INTEGER NOT NULL REFERENCES transacao (id),
+    conta_receber_id INTEGER NOT NULL REFERENCES conta_receber (id), data_conciliacao DATETIME,
+    tipo_conciliacao VARCHAR(50) NOT NULL, confianca FLOAT, observacoes TEXT, usuario_responsavel VARCHAR(100)
+);
+INSERT INTO extrato (id, nome_arquivo, status) VALUES (1, 'antigo.csv', 'concluido');
+INSERT INTO transacao (id, extrato_id, data_transacao, valor, tipo, status_conciliacao)
+    VALUES (1, 1, '2024-01-10', 100.00, 'credito', 'pendente');
+INSERT INTO conta_receber (id, cliente_nome, valor_esperado, status) VALUES (1, 'Cliente', 100.00, 'pendente');
+'''
+
+def test_atualiza_banco_da_versao_anterior(tmp_path):
+    caminho = tmp_path / 'antigo.db'
+    with sqlite3.connect(caminho) as conexao:
+        conexao.executescript(ESQUEMA_ANTERIOR)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}', 'VENCIMENTO_INTERVALO_MINUTOS': 0})
+    
+    with app.app_context():
+        alteracoes = atualizar_esquema()
+        assert 'coluna conta_receber.empresa' in alteracoes
+        assert 'índice único uq_conciliacao_conta_receber_id' in alteracoes
+        # Repetir não altera nada
+        assert atualizar_esquema() == []
+        
+        cliente = app.test_client()
+        for rota in ('/api/conciliacao/pendentes', '/api/extrato/listar', '/api/conta-receber/listar'):
+            assert cliente.get(rota).status_code == 200, rota
+        
+        db.engine.dispose()
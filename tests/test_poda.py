@@ -0,0 +1,54 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from src.models.conciliacao import db, Extrato, Transacao, ContaReceber
+from src.services.pontuacao import encontrar_correspondencias_automaticas, limpar_cache_pontuacao
+
+NOMES = ['João Silva', 'Maria Souza', 'Ana Lima', 'Silva João', 'José', 'JOSÉ ARAÚJO']
+
+def popular(rnd, contas, transacoes):
+    """Contas com poucos valores e datas distintos, para haver empates de confiança"""
+    inicio = date(2025, 3, 1)
+    db.session.add_all([
+        ContaReceber(
+            numero_pedido=f'PED{rnd.randint(1, 20)}',
+            cliente_nome=rnd.choice(NOMES),
+            cliente_cpf_cnpj=rnd.choice([None, '123.456.789-00']),
+            valor_esperado=Decimal(rnd.choice([100, 101, 150, 300])),
+            data_vencimento=rnd.choice([None, inicio + timedelta(days=rnd.randint(0, 30))]),
+            status='pendente'
+        )
+        for _ in range(contas)
+    ])
+    
+    extrato = Extrato(nome_arquivo='poda.csv', status='concluido')
+    db.session.add(extrato)
+    db.session.flush()
+    db.session.add_all([
+        Transacao(
+            extrato_id=extrato.id,
+            data_transacao=inicio + timedelta(days=rnd.randint(0, 30)),
+            valor=Decimal(rnd.choice([100, 150, 299])),
+            tipo='credito',
+            descricao=f'PIX {rnd.choice(NOMES).upper()} PED{rnd.randint(1, 20)}',
+            nome_pagador=rnd.choice(NOMES).upper(),
+            cpf_cnpj_pagador=rnd.choice([None, '123.456.789-00']),
+            status_conciliacao='pendente'
+        )
+        for _ in range(transacoes)
+    ])
+    db.session.commit()
+
+def test_melhores_com_limite_iguais_a_varredura_completa(app):
+    with app.app_context():
+        popular(random.Random(7), contas=300, transacoes=25)
+        
+        for transacao in Transacao.query.all():
+            limpar_cache_pontuacao()
+            completa = encontrar_correspondencias_automaticas(transacao)[:5]
+            limpar_cache_pontuacao()
+            podada = encontrar_correspondencias_automaticas(transacao, limite=5)
+            
+            assert [(c['conta'].id, c['confianca'], c['fatores']) for c in podada] == \
+                [(c['conta'].id, c['confianca'], c['fatores']) for c in completa]
@@ -0,0 +1,28 @@
+import json
+
+import pytest
+from flask import jsonify
+
+from src.services import serializacao
+from src.services.serializacao import codificar_float, resposta_json
+
+# Floats chegam pelos conversores das colunas, como nas listagens
+DADOS = {
+    'cliente_nome': 'José Araújo Conceição',
+    'taxa': codificar_float(2e-05),
+    'descricao': 'PIX 😀 \x7f barra \\ aspas "',
+    'valores': [codificar_float(valor) for valor in (0.0, 1234.56, 1e16, float('nan'), None)],
+    'itens': [{'b': 1, 'a': 'ç'}]
+}
+
+@pytest.mark.parametrize('usar_orjson', [True, False])
+def test_resposta_json_igual_ao_jsonify(app, monkeypatch, usar_orjson):
+    if not usar_orjson:
+        monkeypatch.setattr(serializacao, 'orjson', None)
+    
+    with app.test_request_context():
+        esperado = jsonify(DADOS).get_data()
+        obtido = resposta_json(DADOS).get_data()
+    
+    assert obtido == esperado
+    assert json.loads(obtido)['taxa'] == 2e-05
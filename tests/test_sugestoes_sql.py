@@ -0,0 +1,90 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from src.models.conciliacao import db, Extrato, Transacao, ContaReceber
+from src.services.pontuacao import (
+    encontrar_correspondencias_automaticas, limpar_cache_pontuacao, sugerir_correspondencias_sql
+)
+
+def criar_transacao(**campos):
+    extrato = Extrato(nome_arquivo='sugestoes.csv', status='concluido')
+    db.session.add(extrato)
+    db.session.flush()
+    
+    transacao = Transacao(extrato_id=extrato.id, tipo='credito', status_conciliacao='pendente', **campos)
+    db.session.add(transacao)
+    db.session.commit()
+    return transacao
+
+def criar_conta(**campos):
+    conta = ContaReceber(status='pendente', **campos)
+    db.session.add(conta)
+    db.session.commit()
+    return conta
+
+def sugestoes(transacao):
+    """Sugestões do cálculo em Python e da consulta SQL, como (id, confiança, fatores)"""
+    limpar_cache_pontuacao()
+    python = encontrar_correspondencias_automaticas(transacao)[:5]
+    limpar_cache_pontuacao()
+    sql = sugerir_correspondencias_sql(transacao, limite=5)
+    return [
+        [(c['conta'].id, c['confianca'], c['fatores']) for c in lista]
+        for lista in (python, sql)
+    ]
+
+def test_nome_acentuado_em_maiusculas(app):
+    with app.app_context():
+        transacao = criar_transacao(
+            data_transacao=date(2025, 3, 10), valor=Decimal('150.00'), nome_pagador='JOSÉ', descricao='PIX JOSÉ PED9'
+        )
+        conta = criar_conta(
+            numero_pedido='PED1', cliente_nome='JOSÉ', valor_esperado=Decimal('150.00'), data_vencimento=date(2025, 3, 10)
+        )
+        # Contas de outros clientes com o pedido da descrição: 0.7, abaixo da conta do JOSÉ (0.9)
+        for indice in range(5):
+            criar_conta(
+                numero_pedido='PED9', cliente_nome=f'Outro {indice}', valor_esperado=Decimal('150.00'),
+                data_vencimento=date(2025, 3, 10)
+            )
+        
+        python, sql = sugestoes(transacao)
+        
+        assert python[0][0] == conta.id
+        assert python[0][1] == pytest.approx(0.9)
+        assert sql == python
+
+def test_nome_contido_com_pedido_fora_das_janelas(app):
+    with app.app_context():
+        transacao = criar_transacao(
+            data_transacao=date(2025, 3, 10), valor=Decimal('150.00'), nome_pagador='MARIA SOUZA',
+            descricao='PIX MARIA SOUZA PED77'
+        )
+        conta = criar_conta(
+            numero_pedido='PED77', cliente_nome='Maria Souza Lima', valor_esperado=Decimal('900.00'),
+            data_vencimento=date(2024, 6, 1)
+        )
+        
+        python, sql = sugestoes(transacao)
+        
+        assert [sugestao[0] for sugestao in python] == [conta.id]
+        assert python[0][1] == pytest.approx(0.34)
+        assert sql == python
+
+def test_mesmas_palavras_em_outra_ordem_fora_das_janelas(app):
+    with app.app_context():
+        transacao = criar_transacao(
+            data_transacao=date(2025, 3, 10), valor=Decimal('150.00'), nome_pagador='SILVA JOAO', descricao='PIX'
+        )
+        conta = criar_conta(
+            numero_pedido='PED5', cliente_nome='Joao Silva', valor_esperado=Decimal('900.00'),
+            data_vencimento=date(2024, 6, 1)
+        )
+        
+        python, sql = sugestoes(transacao)
+        
+        assert [sugestao[0] for sugestao in python] == [conta.id]
+        assert python[0][1] == pytest.approx(0.3)
+        assert sql == python
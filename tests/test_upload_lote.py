@@ -0,0 +1,20 @@
+import io
+import zipfile
+
+from src.routes.extrato import ler_membros_zip
+
+def test_zip_acima_do_limite_nao_importa_nenhum_membro(app):
+    app.config['IMPORTACAO_ZIP_TAMANHO_MAXIMO'] = 150
+    app.config['IMPORTACAO_ARQUIVO_TAMANHO_MAXIMO'] = 100
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as pacote:
+        pacote.writestr('janeiro.csv', 'x' * 80)
+        pacote.writestr('fevereiro.csv', 'x' * 80)
+    
+    extratos = []
+    rejeitados = []
+    with app.app_context(), zipfile.ZipFile(buffer) as pacote:
+        ler_membros_zip(pacote, 'extratos.zip', extratos, rejeitados)
+    
+    assert extratos == []
+    assert rejeitados == [{'arquivo': 'extratos.zip', 'erro': 'Conteúdo descompactado do ZIP excede o limite'}]
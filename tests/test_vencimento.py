@@ -0,0 +1,111 @@
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+
+from src.models.conciliacao import db, Extrato, Transacao, ContaReceber, Conciliacao, FaixaVencimento
+from src.services.vencimento import executar_varredura_vencimento, obter_faixas_vencimento
+
+EXECUCOES = 4
+
+def conciliar_contas(vencimentos):
+    """Extrato com uma transação conciliada para cada vencimento; devolve extrato, contas e conciliações"""
+    extrato = Extrato(nome_arquivo='vencimento.csv', status='concluido')
+    db.session.add(extrato)
+    db.session.flush()
+    
+    contas = []
+    conciliacoes = []
+    for vencimento in vencimentos:
+        transacao = Transacao(
+            extrato_id=extrato.id, data_transacao=date.today(), valor=Decimal('100.00'), tipo='credito',
+            status_conciliacao='conciliado'
+        )
+        conta = ContaReceber(
+            numero_pedido='PED1', cliente_nome='Cliente', valor_esperado=Decimal('100.00'),
+            data_vencimento=vencimento, status='pago'
+        )
+        db.session.add_all([transacao, conta])
+        db.session.flush()
+        
+        conciliacao = Conciliacao(transacao_id=transacao.id, conta_receber_id=conta.id, tipo_conciliacao='manual')
+        db.session.add(conciliacao)
+        contas.append(conta)
+        conciliacoes.append(conciliacao)
+    
+    db.session.commit()
+    return extrato, [conta.id for conta in contas], [conciliacao.id for conciliacao in conciliacoes]
+
+def status_contas(ids):
+    return [db.session.get(ContaReceber, id_conta).status for id_conta in ids]
+
+VENCIMENTOS = [date.today() - timedelta(days=10), date.today() + timedelta(days=10), None]
+
+def test_desfazer_conciliacao_reabre_conta_vencida(app):
+    with app.app_context():
+        _, contas, conciliacoes = conciliar_contas(VENCIMENTOS)
+        cliente = app.test_client()
+        
+        for id_conciliacao in conciliacoes:
+            assert cliente.delete(f'/api/conciliacao/{id_conciliacao}').status_code == 200
+        
+        db.session.expire_all()
+        assert status_contas(contas) == ['vencido', 'pendente', 'pendente']
+
+def test_deletar_extrato_reabre_contas_vencidas(app):
+    with app.app_context():
+        extrato, contas, _ = conciliar_contas(VENCIMENTOS)
+        
+        assert app.test_client().delete(f'/api/extrato/{extrato.id}').status_code == 200
+        
+        db.session.expire_all()
+        assert status_contas(contas) == ['vencido', 'pendente', 'pendente']
+
+def test_varreduras_simultaneas_nao_duplicam_faixas(app):
+    with app.app_context():
+        db.session.execute(db.insert(ContaReceber), [
+            {
+                'numero_pedido': f'PED{indice}',
+                'cliente_nome': 'Cliente',
+                'empresa': None if indice % 2 else 'ACME',
+                'valor_esperado': Decimal('10.00'),
+                'data_vencimento': date.today() - timedelta(days=indice * 7),
+                'status': 'pendente'
+            }
+            for indice in range(1, 40)
+        ])
+        db.session.commit()
+    
+    barreira = threading.Barrier(EXECUCOES)
+    erros = []
+    
+    def executar():
+        with app.app_context():
+            try:
+                barreira.wait()
+                executar_varredura_vencimento()
+            except Exception as e:
+                erros.append(e)
+            finally:
+                db.session.remove()
+    
+    threads = [threading.Thread(target=executar) for _ in range(EXECUCOES)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert not erros
+    with app.app_context():
+        faixas = db.session.execute(db.select(FaixaVencimento.empresa, FaixaVencimento.faixa)).all()
+        assert len(faixas) == len(set(faixas)) == 8
+        assert sum(faixa['quantidade'] for faixa in obter_faixas_vencimento()['faixas']) == 39
+
+def test_varredura_em_andamento_e_ignorada(app, monkeypatch):
+    monkeypatch.setattr('src.services.vencimento.obter_trava_varredura', lambda: False)
+    with app.app_context():
+        conciliar_contas([date.today() - timedelta(days=10)])
+        
+        resposta = app.test_client().post('/api/conta-receber/varredura-vencimento')
+        
+        assert resposta.status_code == 409
+        assert db.session.scalar(db.select(db.func.count(FaixaVencimento.id))) == 0